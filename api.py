@@ -1,18 +1,40 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import Response, FileResponse, StreamingResponse
+from fastapi.responses import Response, FileResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-import ast
-import uvicorn
-from tts import speak_and_download, TTSRequest
-from scrape import understand_tickrs, get_keyfacts, get_news, understand_markets, understand_sectors, get_technical_summary, get_sector_news, get_market_news, generate_podcast
+from tts import aspeak_long, aopen_speech_stream, aiter_speech, TTSRequest
+import tts
+from pipeline import run_pipeline
+from jobs import jobs
+from batch import run_batch
+from warmer import warmer
+import scrape
+from cache import scrape_cache, llm_cache, audio_cache, summary_cache
+from singleflight import flights
+from ratelimit import limiters
+import metrics
 import base64
 from fastapi.middleware.cors import CORSMiddleware
 import tempfile
 import json
+import os
 import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy libraries and clients load lazily; WARM_UP=1 loads them in the background right after start-up.
+    if os.getenv("WARM_UP") == "1":
+        app.state.warm_up = asyncio.create_task(asyncio.to_thread(scrape.warm_up))
+    jobs.resume()
+    if os.getenv("CACHE_WARMER") == "1":
+        warmer.start()
+    yield
+    await warmer.stop()
+    await jobs.aclose()
+    await scrape.aclose_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,53 +58,8 @@ async def generate_podcast_text(request: TextRequest):
 
     async def generate():
         try:
-            input = request.text
-            
-            # 생각하는 과정 스트리밍
-            yield f"data: {json.dumps({'type': 'log', 'message': 'Analyzing Market Trends...'})}\n\n"
-            keys = understand_tickrs(input) or []
-            await asyncio.sleep(1)  # 실제 처리 시간을 시뮬레이션
-            
-            yield f"data: {json.dumps({'type': 'log', 'message': 'Gathering Financial Data...'})}\n\n"
-            sectors = understand_sectors(input) or "[]"
-            markets = understand_markets(input) or "[]"
-            await asyncio.sleep(1)
-            
-            summary = ""
-            yield f"data: {json.dumps({'type': 'log', 'message': 'Generating Comprehensive Analysis...'})}\n\n"
-            
-            for key in keys:
-                summary += get_keyfacts(key) or ""
-                summary += get_technical_summary(key) or ""
-                summary += get_news(key) or ""
-                await asyncio.sleep(0.5)
-            
-            try:
-                sectors = ast.literal_eval(sectors)
-            except Exception:
-                sectors = []
-            try:
-                markets = ast.literal_eval(markets)
-            except Exception:
-                markets = []
-            
-            for sec in sectors:
-                summary += get_sector_news(sec) or ""
-                await asyncio.sleep(0.5)
-            
-            for market in markets:
-                summary += get_market_news(market) or ""
-                await asyncio.sleep(0.5)
-            
-            yield f"data: {json.dumps({'type': 'log', 'message': 'Structuring Podcast Content...'})}\n\n"
-            podcast = generate_podcast(summary) or ""
-            
-            yield f"data: {json.dumps({'type': 'log', 'message': 'Generating Podcast Script...'})}\n\n"
-            await asyncio.sleep(1)
-            
-            # 최종 스크립트 전송
-            yield f"data: {json.dumps({'type': 'script', 'content': podcast})}\n\n"
-            
+            async for event in run_pipeline(request.text):
+                yield f"data: {json.dumps(event)}\n\n"
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
     
@@ -91,17 +68,154 @@ async def generate_podcast_text(request: TextRequest):
         media_type="text/event-stream"
     )
 
+class BatchRequest(BaseModel):
+    texts: List[str]
+
+# Many users at once: each ticker, sector and market is researched once for the whole batch.
+# Streams 'script'/'error' events tagged with the input's index, then a throughput 'report'.
+# EXAMPLE: curl -N -X POST http://localhost:8000/batch/podcasts -H "Content-Type: application/json" --data '{"texts": ["Apple and crypto", "Microsoft and bonds"]}'
+@app.post("/batch/podcasts")
+async def batch_podcasts(request: BatchRequest):
+    if not request.texts or not all(text.strip() for text in request.texts):
+        raise HTTPException(status_code=400, detail="Texts cannot be empty")
+
+    async def generate():
+        try:
+            async for event in run_batch(request.texts):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+# Background jobs: the pipeline keeps running if the client disconnects, and events can be replayed.
+# EXAMPLE: curl -X POST http://localhost:8000/jobs -H "Content-Type: application/json" --data '{"text": "Apple and crypto"}'
+# EXAMPLE: curl -N http://localhost:8000/jobs/<job_id>/events -H "Last-Event-ID: 12"
+@app.post("/jobs", status_code=202)
+async def create_job(request: TextRequest):
+    if not request.text:
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    job_id = await jobs.submit(request.text)
+    return {"job_id": job_id, "status": (await asyncio.to_thread(jobs.store.get, job_id))["status"]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(jobs.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, http_request: Request, last_event_id: int = 0):
+    if await asyncio.to_thread(jobs.store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    # EventSource sends Last-Event-ID on reconnect; the query parameter is for clients that cannot set headers.
+    header = http_request.headers.get("last-event-id", "")
+    after = int(header) if header.isdigit() else last_event_id
+
+    async def stream():
+        async for seq, event in jobs.events(job_id, after):
+            yield f"id: {seq}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+def _audio_response(http_request: Request, key: str, path: str):
+    # Cached files never change for a given key, so the key doubles as a strong ETag.
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "X-Audio-Key": key, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in http_request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="audio/mpeg", headers=headers)
+
 @app.post("/generate-audio")
-async def generate_audio(request: TTSRequest):
+async def generate_audio(request: TTSRequest, http_request: Request):
+    key = audio_cache.key(request.text, request.voice_id, tts.VOICE_SETTINGS)
+    path = audio_cache.get(key)
+    if path is not None:
+        return _audio_response(http_request, key, path)
     try:
-        audio_data = speak_and_download(**request.model_dump())     
+        audio_data = await aspeak_long(**request.model_dump())     
 
         if isinstance(audio_data, dict) and "error" in audio_data:
             raise HTTPException(status_code=500, detail=audio_data["error"])
-        return Response(content=audio_data, media_type="audio/mpeg")
+        path = await asyncio.to_thread(audio_cache.put, key, audio_data)
+        if path is None:
+            return Response(content=audio_data, media_type="audio/mpeg")
+        return _audio_response(http_request, key, path)
     except Exception as e:
         print(f"Error in generate_audio: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Cached audio by the X-Audio-Key returned above; GET so <audio> elements can seek with Range requests.
+@app.get("/audio/{key}")
+async def get_audio(key: str, http_request: Request):
+    if len(key) != 64 or any(c not in "0123456789abcdef" for c in key):
+        raise HTTPException(status_code=404, detail="Unknown audio")
+    path = audio_cache.get(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown audio")
+    return _audio_response(http_request, key, path)
+
+async def _tee_to_cache(chunks, key: str):
+    # Only a fully relayed stream is committed; a disconnect discards the partial file.
+    try:
+        with audio_cache.writer(key) as write:
+            async for chunk in chunks:
+                write(chunk)
+                yield chunk
+    finally:
+        await chunks.aclose()
+
+# Same request body as /generate-audio, but MP3 bytes are relayed as ElevenLabs produces them.
+@app.post("/generate-audio/stream")
+async def generate_audio_stream(request: TTSRequest, http_request: Request):
+    key = audio_cache.key(request.text, request.voice_id, tts.VOICE_SETTINGS)
+    path = audio_cache.get(key)
+    if path is not None:
+        return _audio_response(http_request, key, path)
+    response = await aopen_speech_stream(**request.model_dump())
+    if isinstance(response, dict):
+        print(f"Error in generate_audio_stream: {response['error']}")
+        raise HTTPException(status_code=500, detail=response["error"])
+    return StreamingResponse(_tee_to_cache(aiter_speech(response), key), media_type="audio/mpeg", headers={"X-Audio-Key": key})
+
+def _cache_stats() -> dict:
+    # Counters are per worker process; entries and bytes of the shared caches are host-wide.
+    return {
+        "pid": os.getpid(),
+        "scrape": scrape_cache.stats(),
+        "llm": llm_cache.stats(),
+        "audio": audio_cache.stats(),
+        "summaries": summary_cache.stats(),
+        "singleflight": {name: flight.stats() for name, flight in flights.items()},
+        "warmer": warmer.stats(),
+    }
+
+# Stats read the shared SQLite caches, whose locks a write may hold while waiting on another worker.
+@app.get("/cache/stats")
+async def cache_stats():
+    return await asyncio.to_thread(_cache_stats)
+
+def _prometheus_text() -> str:
+    gauges = {
+        "scrape_cache": scrape_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "audio_cache": audio_cache.stats(),
+        "page_summaries": summary_cache.stats(),
+        "singleflight": {name: flight.stats() for name, flight in flights.items()},
+        "rate_limiter": {name: limiter.stats() for name, limiter in limiters.items()},
+        "warmer": warmer.stats(),
+    }
+    return metrics.render(gauges)
+
+# Prometheus scrape target: upstream latency/bytes/token histograms plus the cache, limiter and warmer counters.
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(await asyncio.to_thread(_prometheus_text), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_keep_alive=120) 
\ No newline at end of file
+    import uvicorn
+
+    # WEB_CONCURRENCY=4 runs four worker processes; they share the caches and job store under .cache/.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("api:app" if workers > 1 else app, host="0.0.0.0", port=8000, timeout_keep_alive=120, workers=workers) 
\ No newline at end of file
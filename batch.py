@@ -0,0 +1,158 @@
+# Batch podcast generation for many users at once, e.g. the morning run.
+# Portfolios overlap heavily, so every ticker, sector and market is researched
+# once for the whole batch; only the final script step runs per user.
+#
+# CLI:  python batch.py inputs.txt [--out scripts.jsonl]
+#       one request text per line, or JSON lines with "text" and an optional "id".
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from metrics import RequestTimings
+from pipeline import fan_out, live_requests, research_branches, store_result, pack_research
+
+# Concurrent intent and script calls; research branches use FANOUT_CONCURRENCY.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+def _union(intents) -> tuple[list[str], list[str], list[str]]:
+    tickers, sectors, markets = {}, {}, {}
+    for intent in intents:
+        tickers.update(dict.fromkeys(intent["tickers"]))
+        sectors.update(dict.fromkeys(intent["sectors"]))
+        markets.update(dict.fromkeys(intent["markets"]))
+    return list(tickers), list(sectors), list(markets)
+
+
+async def run_batch(texts: list[str], concurrency: int = BATCH_CONCURRENCY):
+    """
+    Generate a podcast script for each text, yielding event dicts: logs,
+    {'type': 'script', 'index', 'content'} or {'type': 'error', 'index',
+    'message'} per input as each finishes, and a final {'type': 'report'}
+    with throughput and how much research the inputs shared.
+    """
+    from scrape import aunderstand_request, agenerate_podcast
+
+    started = time.perf_counter()
+    timings = RequestTimings()
+    token = timings.collect()
+    try:
+        with live_requests.track():
+            failed = 0
+            yield {'type': 'log', 'message': f"Understanding {len(texts)} requests..."}
+            intents = [None] * len(texts)
+            with timings.stage("intent"):
+                branches = [(i, aunderstand_request, text) for i, text in enumerate(texts)]
+                async for i, _, intent, error in fan_out(branches, limit=concurrency):
+                    if error is not None:
+                        failed += 1
+                        yield {'type': 'error', 'index': i, 'message': f"Intent failed: {error}"}
+                    else:
+                        intents[i] = intent
+
+            keys, sectors, markets = _union(intent for intent in intents if intent is not None)
+            requested = sum(len(i["tickers"]) + len(i["sectors"]) + len(i["markets"]) for i in intents if i is not None)
+            yield {'type': 'log', 'message': (
+                f"Researching {len(keys)} tickers, {len(sectors)} sectors and {len(markets)} markets "
+                f"({requested} requested across all users)..."
+            )}
+            branches, targets = research_branches(keys, sectors, markets)
+            results = {}
+            research_errors = 0
+            with timings.stage("research"):
+                async for index, label, result, error in fan_out(branches):
+                    if error is not None:
+                        research_errors += 1
+                        yield {'type': 'log', 'message': f"{label} failed: {error}"}
+                    else:
+                        store_result(results, targets[index], result)
+
+            yield {'type': 'log', 'message': 'Generating podcast scripts...'}
+
+            async def script(intent):
+                with timings.stage("pack"):
+                    summary, _ = await pack_research(intent, results)
+                with timings.stage("podcast"):
+                    return await agenerate_podcast(summary)
+
+            succeeded = 0
+            script_started = time.perf_counter()
+            pending = [(i, script, intent) for i, intent in enumerate(intents) if intent is not None]
+            async for position, i, content, error in fan_out(pending, limit=concurrency):
+                if error is not None:
+                    failed += 1
+                    yield {'type': 'error', 'index': i, 'message': str(error)}
+                else:
+                    succeeded += 1
+                    yield {'type': 'script', 'index': i, 'content': content}
+            script_seconds = time.perf_counter() - script_started
+
+            seconds = time.perf_counter() - started
+            usage = timings.summary()
+            yield {
+                'type': 'report',
+                'requests': len(texts),
+                'succeeded': succeeded,
+                'failed': failed,
+                'entities': {'tickers': len(keys), 'sectors': len(sectors), 'markets': len(markets)},
+                'entities_requested': requested,
+                'research_branches': len(branches),
+                'research_errors': research_errors,
+                'seconds': round(seconds, 3),
+                'podcasts_per_second': round(succeeded / seconds, 3) if seconds else None,
+                'script_seconds_per_podcast': round(script_seconds / succeeded, 3) if succeeded else None,
+                # Stage times add up across concurrent users, so they can exceed the wall time.
+                'stages_ms': usage['stages_ms'],
+                'upstreams': usage['upstreams'],
+            }
+    finally:
+        RequestTimings.stop(token)
+
+
+def read_inputs(path: str) -> list[dict]:
+    """[{'id', 'text'}] from a file of plain-text lines or JSON lines."""
+    inputs = []
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                data = json.loads(line)
+                inputs.append({"id": data.get("id", n), "text": data["text"]})
+            else:
+                inputs.append({"id": n, "text": line})
+    return inputs
+
+
+async def _main(args):
+    from scrape import aclose_clients
+
+    inputs = read_inputs(args.inputs)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        async for event in run_batch([item["text"] for item in inputs], concurrency=args.concurrency):
+            if event["type"] == "script":
+                out.write(json.dumps({"id": inputs[event["index"]]["id"], "script": event["content"]}) + "\n")
+            elif event["type"] == "error" and "index" in event:
+                out.write(json.dumps({"id": inputs[event["index"]]["id"], "error": event["message"]}) + "\n")
+            elif event["type"] == "log":
+                print(event["message"], file=sys.stderr)
+            elif event["type"] == "report":
+                print(json.dumps(event, indent=2), file=sys.stderr)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate podcast scripts for many users, sharing research between them.")
+    parser.add_argument("inputs", help="file with one request per line (text or JSON with 'text'), or - for stdin")
+    parser.add_argument("--out", default="-", help="JSON lines of {id, script} or {id, error}; default stdout")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args()))
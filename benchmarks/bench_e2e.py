@@ -0,0 +1,152 @@
+"""
+End-to-end benchmark of /generate-podcast-text and /generate-audio, run in
+process against replayed or synthetic upstreams (no network, no API keys).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_e2e                          # synthetic upstreams
+    python -m benchmarks.bench_e2e --fixtures fixtures/upstream --latency recorded
+
+Record fixtures first with UPSTREAM_MODE=record python api.py and a few real
+requests. Caches start empty at each concurrency level; identical concurrent
+upstream calls are still coalesced, as they would be in production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Keep the benchmark's caches away from the real ones; must be set before the app is imported.
+_workdir = tempfile.mkdtemp(prefix="stockast-bench-")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+os.environ.setdefault("SCRAPE_CACHE_PATH", "")
+os.environ.setdefault("SUMMARY_CACHE_PATH", "")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_workdir, "jobs.sqlite3"))
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(_workdir, "audio"))
+os.environ.setdefault("PRICE_STORE_DIR", os.path.join(_workdir, "prices"))
+
+import httpx
+
+import upstream
+from upstream import FixtureStore, ReplayUpstreams, SyntheticUpstreams
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def reset_caches(price_dir: str):
+    from cache import scrape_cache, llm_cache, audio_cache, summary_cache
+
+    scrape_cache.clear()
+    summary_cache._memory.clear()
+    llm_cache.clear()
+    for name in os.listdir(audio_cache.root):
+        os.remove(os.path.join(audio_cache.root, name))
+    audio_cache._bytes = 0
+    if os.path.isdir(price_dir):  # created when the price store is first imported
+        for name in os.listdir(price_dir):
+            os.remove(os.path.join(price_dir, name))
+
+
+async def podcast_request(client: httpx.AsyncClient, i: int) -> dict:
+    started = time.perf_counter()
+    first_script = None
+    script = []
+    ok = False
+    async with client.stream("POST", "/generate-podcast-text", json={"text": f"Apple, Microsoft and crypto #{i}"}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "script_delta":
+                if first_script is None:
+                    first_script = time.perf_counter() - started
+                script.append(event["content"])
+            ok = ok or event["type"] == "script"
+    # The streamed script must look exactly as it does in production: no prompt markers left in it.
+    text = "".join(script).lower()
+    leaked = [marker for marker in ("[final podcast script]", "[end of", "<think>", "</think>") if marker in text]
+    assert not leaked, f"script markers reached the streamed script: {leaked}"
+    return {"seconds": time.perf_counter() - started, "first_script": first_script, "ok": ok}
+
+
+async def audio_request(client: httpx.AsyncClient, i: int) -> dict:
+    text = f"Episode {i}. " + "Markets moved today as investors weighed earnings and rates. " * 30
+    started = time.perf_counter()
+    response = await client.post("/generate-audio", json={"text": text})
+    return {"seconds": time.perf_counter() - started, "first_script": None, "ok": response.status_code == 200}
+
+
+async def run_level(app, request_fn, concurrency: int, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                return await request_fn(client, i)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+
+    latencies = [r["seconds"] for r in results if r["ok"]]
+    first = [r["first_script"] for r in results if r["first_script"] is not None]
+    return {
+        "ok": len(latencies),
+        "failed": requests - len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "first_script_p50": statistics.median(first) if first else None,
+        "throughput": len(latencies) / wall if wall else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="replay recorded fixtures from this directory (synthetic for anything missing)")
+    parser.add_argument("--latency", default="0.1",
+                        help="replay: 'recorded' or fixed seconds per call; synthetic: scale of typical live latency")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="requests per endpoint and level")
+    parser.add_argument("--endpoints", default="podcast,audio")
+    parser.add_argument("--no-rate-limits", action="store_true", help="lift the upstream rate limiters")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        latency = None if args.latency == "recorded" else float(args.latency)
+        adapter = ReplayUpstreams(FixtureStore(args.fixtures), latency=latency, fallback=SyntheticUpstreams(latency_scale=latency or 1.0))
+    else:
+        adapter = SyntheticUpstreams(latency_scale=float(args.latency))
+    upstream.set_upstreams(adapter)
+
+    import api
+    from ratelimit import limiters
+
+    if args.no_rate_limits:
+        for limiter in limiters.values():
+            limiter.rate = limiter.max_rate = limiter.burst = limiter._tokens = 1e6
+
+    endpoints = {"podcast": podcast_request, "audio": audio_request}
+    print(f"{'endpoint':<8} {'conc':>4} {'ok':>4} {'fail':>4} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'1st script':>10} {'req/s':>7}")
+    for name in args.endpoints.split(","):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            reset_caches(os.environ["PRICE_STORE_DIR"])
+            r = asyncio.run(run_level(api.app, endpoints[name], concurrency, args.requests))
+            first = f"{r['first_script_p50']:.3f}" if r["first_script_p50"] is not None else "-"
+            print(f"{name:<8} {concurrency:>4} {r['ok']:>4} {r['failed']:>4} {r['p50']:>8.3f} {r['p95']:>8.3f} "
+                  f"{r['p99']:>8.3f} {first:>10} {r['throughput']:>7.2f}")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold-start check: how long `import api` takes in a fresh interpreter, and
+whether any of the heavy libraries that should load lazily crept back in.
+
+Run from the repository root:  python -m benchmarks.bench_import [--runs 5] [--budget-ms 1000]
+
+Exits non-zero when a deferred module is imported at start-up or the median
+import time is over budget, so it can gate CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Must not be imported by `import api`; they load on first use or via scrape.warm_up().
+DEFERRED = ("pandas", "numpy", "yfinance", "pandas_ta", "aci", "mistralai", "requests", "uvicorn", "rich")
+
+PROBE = (
+    "import sys, time; t = time.perf_counter(); import api; "
+    "print(time.perf_counter() - t); "
+    f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+)
+
+
+def run_once(env: dict) -> tuple[float, list[str]]:
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True).stdout
+    seconds, loaded = out.splitlines()[-2:]
+    return float(seconds), [m for m in loaded.split(",") if m]
+
+
+def slowest_imports(env: dict, top: int = 10) -> list[tuple[int, str]]:
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api"],
+                         env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) == 3:  # imported directly by `api`
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    # Keep the probe away from on-disk caches and job history.
+    env = {**os.environ, "LLM_CACHE_PATH": "", "SCRAPE_CACHE_PATH": "", "SUMMARY_CACHE_PATH": "", "JOBS_DB_PATH": ":memory:"}
+    times, loaded = [], set()
+    for _ in range(args.runs):
+        seconds, modules = run_once(env)
+        times.append(seconds * 1000)
+        loaded.update(modules)
+
+    median = statistics.median(times)
+    print(f"import api: median {median:.0f} ms, min {min(times):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("slowest direct imports (cumulative us):")
+    for cumulative, name in slowest_imports(env):
+        print(f"  {cumulative:>9}  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: loaded at import time: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time {median:.0f} ms is over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
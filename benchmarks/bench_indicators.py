@@ -0,0 +1,97 @@
+"""
+Indicator engine benchmark: pandas_ta per ticker (the old hot path) against the
+NumPy engine in indicators.py, plus a numerical check that both agree.
+
+Run from the repository root:  python -m benchmarks.bench_indicators [n_tickers]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+import indicators
+
+BARS = 63  # about three months of daily bars
+
+
+def random_closes(n_tickers: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, size=(BARS, n_tickers))
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def pandas_ta_latest(close: np.ndarray) -> tuple:
+    """What get_technical_summary used to do for a single ticker."""
+    data = pd.DataFrame({"Close": close}, index=pd.bdate_range("2026-01-01", periods=len(close)))
+    data["RSI"] = ta.rsi(data["Close"])
+    data["SMA20"] = ta.sma(data["Close"], length=20)
+    macd = ta.macd(data["Close"])
+    data = pd.concat([data, macd[["MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]]], axis=1)
+    latest = data.iloc[-1]
+    return latest["RSI"], latest["SMA20"], latest["MACD_12_26_9"]
+
+
+def check_against_pandas_ta(closes: np.ndarray):
+    """Full-series comparison for every ticker; raises if anything drifts."""
+    panel_rsi = indicators.rsi(closes)
+    panel_sma = indicators.sma(closes, 20)
+    panel_macd = indicators.macd(closes)
+    for i in range(closes.shape[1]):
+        series = pd.Series(closes[:, i])
+        expected_macd = ta.macd(series)
+        pairs = [
+            (panel_rsi[:, i], ta.rsi(series)),
+            (panel_sma[:, i], ta.sma(series, length=20)),
+            (panel_macd[0][:, i], expected_macd["MACD_12_26_9"]),
+            (panel_macd[1][:, i], expected_macd["MACDs_12_26_9"]),
+            (panel_macd[2][:, i], expected_macd["MACDh_12_26_9"]),
+        ]
+        for actual, expected in pairs:
+            np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+        state = indicators.TechnicalState.from_closes(closes[:, i])
+        np.testing.assert_allclose(
+            [state.latest["rsi"], state.latest["sma20"], state.latest["macd"]],
+            [panel_rsi[-1, i], panel_sma[-1, i], panel_macd[0][-1, i]],
+            rtol=1e-9,
+        )
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_tickers: int = 50):
+    closes = random_closes(n_tickers)
+    check_against_pandas_ta(closes)
+    print(f"numerics: NumPy engine matches pandas_ta on {n_tickers} tickers x {BARS} bars")
+
+    before = timed(lambda: [pandas_ta_latest(closes[:, i]) for i in range(n_tickers)])
+    per_ticker = timed(lambda: [
+        (indicators.rsi(closes[:, i])[-1], indicators.sma(closes[:, i], 20)[-1], indicators.macd(closes[:, i])[0][-1])
+        for i in range(n_tickers)
+    ])
+    panel = timed(lambda: (indicators.rsi(closes)[-1], indicators.sma(closes, 20)[-1], indicators.macd(closes)[0][-1]))
+    states = [indicators.TechnicalState.from_closes(closes[:, i]) for i in range(n_tickers)]
+    streaming = timed(lambda: [state.update(100.0) for state in states])
+
+    rows = [
+        ("pandas_ta, per ticker", before),
+        ("NumPy, per ticker", per_ticker),
+        ("NumPy, whole panel", panel),
+        ("streaming, one new bar", streaming),
+    ]
+    print(f"{'path':<26}{'total ms':>10}{'us/ticker':>12}{'speedup':>10}")
+    for name, seconds in rows:
+        print(f"{name:<26}{seconds * 1e3:>10.2f}{seconds * 1e6 / n_tickers:>12.1f}{before / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,734 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from shared import FileLock, connect
+
+# Seconds a scraped page stays fresh, by page type. Override with SCRAPE_TTL_<TYPE>.
+PAGE_TTLS = {
+    "quote": 60,
+    "news": 300,
+    "sector": 900,
+    "market": 600,
+    "article": 3600,
+}
+
+
+def page_type(url: str) -> str:
+    """Classify a Yahoo Finance URL so it can get its own TTL."""
+    path = url.split("finance.yahoo.com", 1)[-1]
+    if path.startswith("/quote/"):
+        return "news" if path.rstrip("/").endswith("/news") else "quote"
+    if path.startswith("/sectors/"):
+        return "sector"
+    if path.startswith("/markets/"):
+        return "market"
+    return "article"
+
+
+def _create_totals(db, table: str):
+    """
+    Running entry and byte counts for `table`, kept in a one-row-per-table
+    `totals` table so writes never have to sum the whole cache. Seeded from
+    the table itself the first time, e.g. for files written before it existed.
+    """
+    db.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, entries INTEGER NOT NULL, bytes INTEGER NOT NULL)")
+    db.execute(f"INSERT OR IGNORE INTO totals SELECT ?, COUNT(*), COALESCE(SUM(size), 0) FROM {table}", (table,))
+
+
+def _replace_and_trim(db, table: str, row: dict, max_bytes: int) -> list[str]:
+    """
+    Insert or replace `row` in `table`, evict least recently accessed rows
+    until the total fits in `max_bytes`, and update the totals to match.
+    Call inside a write transaction (BEGIN IMMEDIATE) so the old size read
+    here cannot change under another process. Returns the evicted keys.
+    """
+    old = db.execute(f"SELECT size FROM {table} WHERE key = ?", (row["key"],)).fetchone()
+    columns = ", ".join(row)
+    db.execute(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+    entries, total = db.execute("SELECT entries, bytes FROM totals WHERE name = ?", (table,)).fetchone()
+    entries += old is None
+    total += row["size"] - (old[0] if old else 0)
+    evicted = []
+    while total > max_bytes:
+        oldest = db.execute(f"SELECT key, size FROM {table} ORDER BY accessed LIMIT 1").fetchone()
+        if oldest is None:
+            break
+        db.execute(f"DELETE FROM {table} WHERE key = ?", (oldest[0],))
+        evicted.append(oldest[0])
+        entries -= 1
+        total -= oldest[1]
+    db.execute("UPDATE totals SET entries = ?, bytes = ? WHERE name = ?", (entries, total, table))
+    return evicted
+
+
+# Set by ScrapeCache.refreshing(); lookups in that context skip the cache and store a new copy.
+_force_refresh = contextvars.ContextVar("force_refresh", default=False)
+
+
+class _MemoryPages:
+    """Scraped pages held by this process only."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size, fetched_at, ttl)
+        self._bytes = 0
+        self._refreshing = set()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        value, _, fetched_at, ttl = entry
+        return value, fetched_at, ttl
+
+    def put(self, key: str, value: str, size: int, fetched_at: float, ttl: float) -> int:
+        """Store a page and return how many were evicted to make room."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size, fetched_at, ttl)
+        self._bytes += size
+        evictions = 0
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size, _, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            evictions += 1
+        return evictions
+
+    def claim_refresh(self, key: str) -> bool:
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def release_refresh(self, key: str):
+        self._refreshing.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def size(self) -> tuple[int, int]:
+        return len(self._entries), self._bytes
+
+
+class _SQLitePages:
+    """
+    Scraped pages in a SQLite file shared by every worker process on the host.
+
+    A stale page is refreshed by whichever process first claims it; the claim
+    lapses after REFRESH_LEASE seconds in case that process dies mid-fetch.
+    """
+
+    REFRESH_LEASE = 120
+    # Access times are only rewritten when older than this, so hits rarely need the write lock.
+    TOUCH_SECONDS = 60
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._db = connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL, "
+            "ttl REAL NOT NULL, accessed REAL NOT NULL, refreshing_until REAL NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+        _create_totals(self._db, "pages")
+        self._db.commit()
+
+    def get(self, key: str):
+        row = self._db.execute(
+            "SELECT value, fetched_at, ttl, accessed FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[3] > self.TOUCH_SECONDS:
+            with self._db:
+                self._db.execute("UPDATE pages SET accessed = ? WHERE key = ?", (now, key))
+        return row[0], row[1], row[2]
+
+    def put(self, key: str, value: str, size: int, fetched_at: float, ttl: float) -> int:
+        row = {"key": key, "value": value, "size": size, "fetched_at": fetched_at, "ttl": ttl, "accessed": fetched_at}
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            evicted = _replace_and_trim(self._db, "pages", row, self.max_bytes)
+        return len(evicted)
+
+    def claim_refresh(self, key: str) -> bool:
+        now = time.time()
+        with self._db:
+            claimed = self._db.execute(
+                "UPDATE pages SET refreshing_until = ? WHERE key = ? AND refreshing_until < ?",
+                (now + self.REFRESH_LEASE, key, now),
+            ).rowcount
+        return claimed == 1
+
+    def release_refresh(self, key: str):
+        with self._db:
+            self._db.execute("UPDATE pages SET refreshing_until = 0 WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("UPDATE totals SET entries = 0, bytes = 0 WHERE name = 'pages'")
+
+    def size(self) -> tuple[int, int]:
+        return self._db.execute("SELECT entries, bytes FROM totals WHERE name = 'pages'").fetchone()
+
+
+class ScrapeCache:
+    """
+    LRU cache of scraped pages bounded by total bytes.
+
+    Entries are fresh for their page type's TTL. After that they are still
+    served for up to `max_stale` seconds while a single background refresh
+    fetches a new copy (stale-while-revalidate); older entries count as misses.
+
+    With a `path`, pages live in a SQLite file that every worker process on
+    the host shares, and only one of them refreshes a stale page. Without one
+    they are kept in this process's memory.
+    """
+
+    def __init__(self, max_bytes: int, max_stale: float, ttls: dict | None = None, path: str = ""):
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self.ttls = dict(ttls or PAGE_TTLS)
+        self.path = path
+        self._pages = _SQLitePages(path, max_bytes) if path else _MemoryPages(max_bytes)
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0,
+            "forced": 0,
+        }
+
+    @staticmethod
+    def key(url: str, options: dict) -> str:
+        return url + "|" + json.dumps(options, sort_keys=True)
+
+    def _lookup(self, key: str):
+        """Return (value, needs_refresh) or (None, False) on a miss."""
+        with self._lock:
+            if _force_refresh.get():
+                self.counters["forced"] += 1
+                return None, False
+            entry = self._pages.get(key)
+            if entry is not None:
+                value, fetched_at, ttl = entry
+                age = time.time() - fetched_at
+                if age <= ttl:
+                    self.counters["hits"] += 1
+                    return value, False
+                if age <= ttl + self.max_stale:
+                    self.counters["stale_hits"] += 1
+                    return value, self._pages.claim_refresh(key)
+            self.counters["misses"] += 1
+            return None, False
+
+    def _store(self, key: str, url: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        ttl = self.ttls.get(page_type(url), PAGE_TTLS["article"])
+        with self._lock:
+            self.counters["evictions"] += self._pages.put(key, value, size, time.time(), ttl)
+
+    def _refresh_done(self, key: str, ok: bool):
+        with self._lock:
+            self._pages.release_refresh(key)
+            self.counters["refreshes" if ok else "refresh_errors"] += 1
+
+    def get_or_fetch(self, url: str, options: dict, fetch):
+        """Return the cached page for (url, options), calling `fetch()` on a miss."""
+        key = self.key(url, options)
+        value, needs_refresh = self._lookup(key)
+        if value is None:
+            value = fetch()
+            self._store(key, url, value)
+        elif needs_refresh:
+            def refresh():
+                try:
+                    self._store(key, url, fetch())
+                    self._refresh_done(key, True)
+                except Exception:
+                    self._refresh_done(key, False)
+
+            threading.Thread(target=refresh, daemon=True).start()
+        return value
+
+    async def _on_disk(self, fn, *args):
+        # SQLite calls can wait on another worker's write; keep them off the event loop.
+        if self.path:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def aget_or_fetch(self, url: str, options: dict, afetch):
+        """Async variant of get_or_fetch; `afetch` is a coroutine function."""
+        key = self.key(url, options)
+        value, needs_refresh = await self._on_disk(self._lookup, key)
+        if value is None:
+            value = await afetch()
+            await self._on_disk(self._store, key, url, value)
+        elif needs_refresh:
+            async def refresh():
+                try:
+                    await self._on_disk(self._store, key, url, await afetch())
+                    await self._on_disk(self._refresh_done, key, True)
+                except Exception:
+                    await self._on_disk(self._refresh_done, key, False)
+
+            task = asyncio.create_task(refresh())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return value
+
+    @staticmethod
+    @contextlib.contextmanager
+    def refreshing():
+        """Within this block (and tasks or threads started from it) pages are re-fetched, not read from the cache."""
+        token = _force_refresh.set(True)
+        try:
+            yield
+        finally:
+            _force_refresh.reset(token)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+            served = self.counters["hits"] + self.counters["stale_hits"]
+            entries, total = self._pages.size()
+            return {
+                **self.counters,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hit_rate": served / lookups if lookups else 0.0,
+            }
+
+
+# Set SCRAPE_CACHE_PATH to an empty string to keep pages in this process's memory only.
+scrape_cache = ScrapeCache(
+    path=os.getenv("SCRAPE_CACHE_PATH", os.path.join(".cache", "scrape.sqlite3")),
+    max_bytes=int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    max_stale=float(os.getenv("SCRAPE_CACHE_MAX_STALE", "3600")),
+    ttls={kind: int(os.getenv(f"SCRAPE_TTL_{kind.upper()}", ttl)) for kind, ttl in PAGE_TTLS.items()},
+)
+
+
+class LLMCache:
+    """
+    Content-addressed cache of chat completions.
+
+    Keys are a SHA-256 of (model, messages, response_format). A small in-memory
+    LRU sits in front of a SQLite table that is trimmed by total size, evicting
+    the least recently used responses first. The table is shared by every
+    worker process on the host; entries never change, so the in-memory copies
+    cannot go stale.
+    """
+
+    # Access times are only rewritten when older than this, so disk hits rarely need the write lock.
+    TOUCH_SECONDS = 60
+
+    def __init__(self, path: str, max_bytes: int, memory_items: int = 256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "bypassed": 0,
+        }
+        self._db = None
+        if path:
+            self._db = connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            _create_totals(self._db, "responses")
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, messages: list, response_format=None) -> str:
+        payload = json.dumps([model, messages, response_format], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, accessed FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    now = time.time()
+                    if now - row[1] > self.TOUCH_SECONDS:
+                        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                    self._remember(key, row[0])
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+            self.counters["misses"] += 1
+            return None
+
+    async def aget(self, key: str):
+        """get() for async callers: memory hits answer inline, disk lookups run in a worker thread."""
+        if self._db is None:
+            return self.get(key)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str):
+        if self._db is None:
+            self.put(key, value)
+        else:
+            await asyncio.to_thread(self.put, key, value)
+
+    def put(self, key: str, value: str):
+        if not isinstance(value, str):
+            return
+        with self._lock:
+            self._remember(key, value)
+            self.counters["writes"] += 1
+            if self._db is None:
+                return
+            row = {"key": key, "value": value, "size": len(value.encode("utf-8")), "accessed": time.time()}
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                evicted = _replace_and_trim(self._db, "responses", row, self.max_bytes)
+            for evicted_key in evicted:
+                self._memory.pop(evicted_key, None)
+            self.counters["evictions"] += len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM responses")
+                    self._db.execute("UPDATE totals SET entries = 0, bytes = 0 WHERE name = 'responses'")
+
+    def bypass(self):
+        with self._lock:
+            self.counters["bypassed"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {**self.counters, "memory_entries": len(self._memory)}
+            if self._db is not None:
+                entries, total = self._db.execute(
+                    "SELECT entries, bytes FROM totals WHERE name = 'responses'"
+                ).fetchone()
+                stats.update(disk_entries=entries, disk_bytes=total, max_bytes=self.max_bytes)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+            return stats
+
+
+# Set LLM_CACHE_PATH to an empty string to keep the cache in memory only.
+llm_cache = LLMCache(
+    path=os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm.sqlite3")),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    memory_items=int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256")),
+)
+
+
+# Parts of a scraped page that change between loads without its news changing.
+_VOLATILE = [
+    re.compile(r"!\[[^\]]*\]\([^)]*\)"),  # images
+    re.compile(r"(?<=\])\([^)]*\)"),  # link targets, which carry per-load tracking parameters
+    re.compile(r"\b\d+\s*(?:seconds?|secs?|minutes?|mins?|hours?|hrs?|[smh])\s+ago\b", re.IGNORECASE),
+    re.compile(r"\b(?:just now|yesterday)\b", re.IGNORECASE),
+]
+
+
+def normalize_page(markdown: str) -> str:
+    for pattern in _VOLATILE:
+        markdown = pattern.sub("", markdown)
+    return " ".join(markdown.split()).lower()
+
+
+class PageSummaryCache:
+    """
+    The last summary written for each scraped URL, with a fingerprint of the
+    normalized page and the prompt that produced it. When a fresh scrape has
+    the same fingerprint, the stored summary is reused and the LLM is not
+    called, even if timestamps or tracking links on the page moved.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._memory = {}  # url -> (fingerprint, summary), when there is no path
+        self._lock = threading.Lock()
+        self.counters = {"reused": 0, "changed": 0, "new": 0}
+        self._db = None
+        if path:
+            self._db = connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "url TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, summary TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def fingerprint(page: str, model: str, system: str) -> str:
+        payload = json.dumps([model, system, normalize_page(page)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, url: str, fingerprint: str) -> str | None:
+        """The stored summary of `url` if it was made from a page with this fingerprint."""
+        with self._lock:
+            if self._db is not None:
+                entry = self._db.execute("SELECT fingerprint, summary FROM summaries WHERE url = ?", (url,)).fetchone()
+            else:
+                entry = self._memory.get(url)
+            if entry is None:
+                self.counters["new"] += 1
+                return None
+            if entry[0] != fingerprint:
+                self.counters["changed"] += 1
+                return None
+            self.counters["reused"] += 1
+            return entry[1]
+
+    async def aget(self, url: str, fingerprint: str) -> str | None:
+        if self._db is None:
+            return self.get(url, fingerprint)
+        return await asyncio.to_thread(self.get, url, fingerprint)
+
+    async def aput(self, url: str, fingerprint: str, summary: str):
+        if self._db is None:
+            self.put(url, fingerprint, summary)
+        else:
+            await asyncio.to_thread(self.put, url, fingerprint, summary)
+
+    def put(self, url: str, fingerprint: str, summary: str):
+        if not isinstance(summary, str):
+            return
+        with self._lock:
+            if self._db is None:
+                self._memory[url] = (fingerprint, summary)
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (url, fingerprint, summary, updated) VALUES (?, ?, ?, ?)",
+                (url, fingerprint, summary, time.time()),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(self.counters.values())
+            if self._db is not None:
+                entries = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            else:
+                entries = len(self._memory)
+            return {
+                **self.counters,
+                "entries": entries,
+                "skip_rate": self.counters["reused"] / lookups if lookups else 0.0,
+            }
+
+
+# Set SUMMARY_CACHE_PATH to an empty string to keep page fingerprints in memory only.
+summary_cache = PageSummaryCache(os.getenv("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite3")))
+
+
+class AudioCache:
+    """
+    Content-addressed MP3 files on disk, keyed by a SHA-256 of (text, voice_id,
+    voice_settings). Once the directory grows past `max_bytes`, the least
+    recently used files (by mtime, refreshed on every hit) are deleted.
+
+    Files appear atomically, so worker processes sharing the directory only
+    coordinate on eviction: one process at a time rescans and trims it.
+    """
+
+    # Files touched this recently are never evicted, so a response that is
+    # still being sent does not lose its file.
+    EVICTION_GRACE_SECONDS = 60
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._evicting = FileLock(os.path.join(root, ".evict.lock"))
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def key(text: str, voice_id: str, voice_settings: dict) -> str:
+        payload = json.dumps([text, voice_id, voice_settings], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.mp3")
+
+    def get(self, key: str) -> str | None:
+        """Path of the cached file for `key`, or None."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+        with self._lock:
+            self.counters["hits"] += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> str | None:
+        """Store `data` and return its path, or None if it could not be written."""
+        with self.writer(key) as write:
+            write(data)
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def writer(self, key: str):
+        """Context manager for writing a file in pieces; it only appears in the cache if the block completes."""
+        return _AudioWriter(self, key)
+
+    # Other processes write to the directory too, so the running total is re-read this often.
+    RESCAN_SECONDS = 60
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # evicted by another process meanwhile
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        self._bytes = sum(size for _, size, _ in entries)
+        self._scanned_at = time.monotonic()
+        return entries
+
+    def _committed(self, size: int):
+        with self._lock:
+            self._bytes += size
+            self.counters["writes"] += 1
+            if self._bytes <= self.max_bytes and time.monotonic() - self._scanned_at < self.RESCAN_SECONDS:
+                return
+            # Whoever holds the lock is already trimming the directory for everyone.
+            if not self._evicting.acquire(blocking=False):
+                return
+            try:
+                now = time.time()
+                for mtime, size, path in sorted(self._scan()):
+                    if self._bytes <= self.max_bytes or now - mtime < self.EVICTION_GRACE_SECONDS:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._bytes -= size
+                    self.counters["evictions"] += 1
+            finally:
+                self._evicting.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class _AudioWriter:
+    """
+    Writes one response into its own temp file. Concurrent writers for the same
+    key never share a file; the first to finish publishes it and the others
+    are discarded. Disk errors only cost the cache entry, never the response
+    being relayed.
+    """
+
+    def __init__(self, cache: AudioCache, key: str):
+        self.cache = cache
+        self.key = key
+        self.size = 0
+        self._file = None
+
+    def __enter__(self):
+        try:
+            fd, self._tmp = tempfile.mkstemp(dir=self.cache.root, prefix=f"{self.key}.", suffix=".tmp")
+            self._file = os.fdopen(fd, "wb")
+        except OSError as e:
+            print(f"Audio cache: not caching {self.key}: {e}")
+        return self.write
+
+    def write(self, chunk: bytes):
+        if self._file is None:
+            return
+        try:
+            self._file.write(chunk)
+            self.size += len(chunk)
+        except OSError as e:
+            print(f"Audio cache: not caching {self.key}: {e}")
+            self._discard()
+
+    def _discard(self):
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is None:
+            return False
+        try:
+            if exc_type is None:
+                self._file.close()
+                # link() never replaces an existing file, so a finished entry is never overwritten.
+                os.link(self._tmp, self.cache.path(self.key))
+                self.cache._committed(self.size)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            print(f"Audio cache: not caching {self.key}: {e}")
+        finally:
+            self._discard()
+        return False
+
+
+audio_cache = AudioCache(
+    root=os.getenv("AUDIO_CACHE_DIR", os.path.join(".cache", "audio")),
+    max_bytes=int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))),
+)
@@ -1,20 +1,163 @@
-import yfinance as yf
+from collections import deque
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+from pricestore import get_price_store
+from metrics import track
+
+# NumPy versions of the pandas_ta indicators used in the technical summaries.
+# They take a contiguous float array of closes, either 1-D or 2-D with one
+# column per ticker and no gaps, and follow pandas_ta's formulas (no TA-Lib).
+# Leading values are NaN until an indicator has enough history.
+
+def _ewm(x: np.ndarray, alpha: float, start: int) -> np.ndarray:
+    """pandas ewm(adjust=False) over x[start:], NaN before `start`."""
+    out = np.full(x.shape, np.nan)
+    if start >= len(x):
+        return out
+    out[start] = x[start]
+    keep = 1.0 - alpha
+    for i in range(start + 1, len(x)):
+        out[i] = keep * out[i - 1] + alpha * x[i]
+    return out
+
+def sma(close, length: int = 20) -> np.ndarray:
+    x = np.asarray(close, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= length:
+        windows = np.lib.stride_tricks.sliding_window_view(x, length, axis=0)
+        out[length - 1:] = windows.mean(axis=-1)
+    return out
+
+def ema(close, length: int = 10) -> np.ndarray:
+    """EMA seeded with the SMA of the first `length` values, like pandas_ta."""
+    x = np.array(close, dtype=np.float64)
+    if len(x) < length:
+        return np.full(x.shape, np.nan)
+    x[length - 1] = x[:length].mean(axis=0)
+    return _ewm(x, 2.0 / (length + 1), length - 1)
+
+def rsi(close, length: int = 14) -> np.ndarray:
+    x = np.asarray(close, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if len(x) < 2:
+        return out
+    change = np.diff(x, axis=0)
+    avg_gain = _ewm(np.maximum(change, 0.0), 1.0 / length, 0)
+    avg_loss = _ewm(np.maximum(-change, 0.0), 1.0 / length, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[1:] = 100 * avg_gain / (avg_gain + avg_loss)
+    return out
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Return (macd, signal, histogram) arrays with the same shape as `close`."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(line.shape, np.nan)
+    if len(line) >= slow:
+        signal_line[slow - 1:] = ema(line[slow - 1:], signal)
+    return line, signal_line, line - signal_line
+
+
+# Streaming counterparts: O(1) state advanced one bar at a time. Fed the same
+# closes in order, they end on the same values as the vectorized functions.
+
+class StreamingSMA:
+    def __init__(self, length: int = 20):
+        self.length = length
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, x: float) -> float:
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.length:
+            self._sum -= self._window.popleft()
+        return self._sum / self.length if len(self._window) == self.length else np.nan
+
+class StreamingEMA:
+    def __init__(self, length: int = 10):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self._seed = StreamingSMA(length)
+        self.value = np.nan
+
+    def update(self, x: float) -> float:
+        if np.isnan(self.value):
+            self.value = self._seed.update(x)
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+class StreamingRSI:
+    def __init__(self, length: int = 14):
+        self.alpha = 1.0 / length
+        self._prev = None
+        self._gain = np.nan
+        self._loss = np.nan
+
+    def update(self, x: float) -> float:
+        if self._prev is None:
+            self._prev = x
+            return np.nan
+        change, self._prev = x - self._prev, x
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if np.isnan(self._gain):
+            self._gain, self._loss = gain, loss
+        else:
+            self._gain = (1.0 - self.alpha) * self._gain + self.alpha * gain
+            self._loss = (1.0 - self.alpha) * self._loss + self.alpha * loss
+        total = self._gain + self._loss
+        return 100 * self._gain / total if total else np.nan
+
+class StreamingMACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = StreamingEMA(fast)
+        self._slow = StreamingEMA(slow)
+        self._signal = StreamingEMA(signal)
+
+    def update(self, x: float):
+        """Return (macd, signal, histogram) after adding close `x`."""
+        line = self._fast.update(x) - self._slow.update(x)
+        if np.isnan(line):
+            return np.nan, np.nan, np.nan
+        signal_line = self._signal.update(line)
+        return line, signal_line, line - signal_line
+
+class TechnicalState:
+    """RSI, SMA20 and MACD for one ticker, advanced with each new close."""
+
+    def __init__(self):
+        self._rsi = StreamingRSI()
+        self._sma = StreamingSMA(20)
+        self._macd = StreamingMACD()
+        self.latest = {"close": np.nan, "rsi": np.nan, "sma20": np.nan, "macd": np.nan}
+
+    @classmethod
+    def from_closes(cls, closes) -> "TechnicalState":
+        state = cls()
+        for x in np.asarray(closes, dtype=np.float64):
+            state.update(x)
+        return state
+
+    def update(self, close: float) -> dict:
+        self.latest = {
+            "close": close,
+            "rsi": self._rsi.update(close),
+            "sma20": self._sma.update(close),
+            "macd": self._macd.update(close)[0],
+        }
+        return self.latest
+
 
 def get_technical_summary(ticker: str) -> str:
-    # --- Step 1: Download historical data
-    data = yf.download(ticker, period="3mo", interval="1d")
+    # --- Step 1: Load historical data (only missing bars are downloaded)
+    with track("pricestore", "closes"):
+        close = get_price_store().closes([ticker], months=3)[ticker]
 
-    if data.empty:
+    if close.empty:
         return f"Could not download data for ticker: {ticker}"
 
-    # --- Step 2: Flatten MultiIndex columns if they exist
-    if isinstance(data.columns, pd.MultiIndex):
-        data.columns = [col[0] for col in data.columns]
-
-    # --- Step 3: Drop missing values
-    data = data.dropna(subset=["Close"])
+    # --- Steps 2-3: Closes come back flat and without missing values
+    data = close.rename("Close").to_frame()
 
     # Check if data is sufficient for MACD and other indicators
     MIN_PERIODS_MACD = 26  # Common requirement for MACD's slow EMA
@@ -25,19 +168,11 @@ def get_technical_summary(ticker: str) -> str:
         return f"Insufficient data for {ticker} to calculate all technical indicators after cleaning. Need at least {max(MIN_PERIODS_MACD, MIN_PERIODS_RSI, MIN_PERIODS_SMA)} data points, but got {len(data)}."
 
     # --- Step 4: Calculate technical indicators
-    data["RSI"] = ta.rsi(data["Close"])
-    data["SMA20"] = ta.sma(data["Close"], length=20)
-
-    macd = ta.macd(data["Close"])
-    if macd is not None and not macd.empty:
-        # Ensure all MACD columns are present before concatenating
-        required_macd_cols = ['MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9']
-        if all(col in macd.columns for col in required_macd_cols):
-            data = pd.concat([data, macd[required_macd_cols]], axis=1)
-        else:
-            return f"MACD calculation for {ticker} did not return all expected columns."
-    else:
-        return f"MACD calculation failed for {ticker}."
+    with track("numpy", "indicators"):
+        closes = data["Close"].to_numpy()
+        data["RSI"] = rsi(closes)
+        data["SMA20"] = sma(closes, length=20)
+        data["MACD_12_26_9"], data["MACDs_12_26_9"], data["MACDh_12_26_9"] = macd(closes)
 
     # --- Step 5: Generate natural-language summary
     if data.empty: # Should be caught earlier, but as a safeguard
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from pipeline import run_pipeline
+from shared import connect, pid_alive
+
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+# How often a worker checks on a job that another worker process is running.
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "0.5"))
+
+# Job states. "queued" and "running" jobs whose worker process is gone were interrupted and are resumed.
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class JobStore:
+    """SQLite record of podcast jobs: their state, every event sent, and completed stage outputs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, text TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "created REAL NOT NULL, updated REAL NOT NULL, owner INTEGER);"
+            "CREATE TABLE IF NOT EXISTS events ("
+            "job_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (job_id, seq));"
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "job_id TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (job_id, name));"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+        if "owner" not in columns:  # databases created before jobs recorded their worker
+            try:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+            except sqlite3.OperationalError:  # another worker added it first
+                pass
+        self._db.commit()
+
+    def create(self, text: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, text, status, created, updated, owner) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, text, QUEUED, now, now, os.getpid()),
+            )
+            self._db.commit()
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, text, status, result, error, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            stages = [name for (name,) in self._db.execute(
+                "SELECT name FROM stages WHERE job_id = ? ORDER BY rowid", (job_id,)
+            )]
+            last_event = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        keys = ("id", "text", "status", "result", "error", "created", "updated")
+        return {**dict(zip(keys, row)), "stages": stages, "last_event_id": last_event}
+
+    def set_status(self, job_id: str, status: str, result: str = None, error: str = None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = COALESCE(?, result), error = ?, updated = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+            self._db.commit()
+
+    def claim_orphans(self) -> list[str]:
+        """Take over unfinished jobs whose worker process has exited; each is claimed by one process only."""
+        pid = os.getpid()
+        claimed = []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, owner FROM jobs WHERE status IN (?, ?) ORDER BY created", (QUEUED, RUNNING)
+            ).fetchall()
+            for job_id, owner in rows:
+                # A job already tagged with our pid belongs to an earlier process that had the same pid.
+                if owner != pid and pid_alive(owner):
+                    continue
+                updated = self._db.execute(
+                    "UPDATE jobs SET owner = ? WHERE id = ? AND owner IS ?", (pid, job_id, owner)
+                ).rowcount
+                self._db.commit()
+                if updated:
+                    claimed.append(job_id)
+        return claimed
+
+    def running_elsewhere(self, job_id: str) -> bool:
+        """Whether another live worker process is running this job."""
+        with self._lock:
+            row = self._db.execute("SELECT status, owner FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] in FINISHED:
+            return False
+        return row[1] != os.getpid() and pid_alive(row[1])
+
+    def append_event(self, job_id: str, event: dict) -> int:
+        with self._lock:
+            seq = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._db.execute(
+                "INSERT INTO events (job_id, seq, data) VALUES (?, ?, ?)", (job_id, seq, json.dumps(event))
+            )
+            self._db.commit()
+        return seq
+
+    def events_after(self, job_id: str, seq: int) -> list[tuple[int, dict]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, data FROM events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, seq)
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def load_stages(self, job_id: str) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT name, value FROM stages WHERE job_id = ?", (job_id,)).fetchall()
+        return {name: json.loads(value) for name, value in rows}
+
+    def save_stage(self, job_id: str, name: str, value):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stages (job_id, name, value) VALUES (?, ?, ?)",
+                (job_id, name, json.dumps(value)),
+            )
+            self._db.commit()
+
+
+class JobStages:
+    """
+    Mapping view of one job's completed stages, as expected by run_pipeline.
+
+    Stages are read from the store once by load(); after that reads come from
+    memory and each write is persisted in a worker thread, so the pipeline
+    never waits on SQLite from the event loop. flush() waits for those writes.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, values: dict | None = None):
+        self.store = store
+        self.job_id = job_id
+        self._values = dict(values or {})
+        self._pending = set()
+
+    @classmethod
+    async def load(cls, store: JobStore, job_id: str) -> "JobStages":
+        return cls(store, job_id, await asyncio.to_thread(store.load_stages, job_id))
+
+    def get(self, name: str, default=None):
+        value = self._values.get(name)
+        return default if value is None else value
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __getitem__(self, name: str):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name: str, value):
+        self._values[name] = value
+        task = asyncio.ensure_future(asyncio.to_thread(self.store.save_stage, self.job_id, name, value))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def flush(self):
+        """Wait until every stage written so far is stored."""
+        if self._pending:
+            await asyncio.gather(*self._pending)
+
+
+class JobManager:
+    """
+    Runs podcast jobs in background tasks, independent of any client connection.
+
+    Every event a job produces is persisted with a sequence number, so clients
+    can reconnect and continue from the last event they saw. Jobs interrupted
+    by a restart are picked up again by resume() and skip their completed stages.
+    """
+
+    def __init__(self, store: JobStore, concurrency: int = JOBS_CONCURRENCY):
+        self.store = store
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._tasks = {}
+        self._last_seq = {}
+        self._changed = None
+
+    async def submit(self, text: str) -> str:
+        job_id = await asyncio.to_thread(self.store.create, text)
+        self._start(job_id)
+        return job_id
+
+    def resume(self) -> list[str]:
+        job_ids = [job_id for job_id in self.store.claim_orphans() if job_id not in self._tasks]
+        for job_id in job_ids:
+            self._start(job_id, resumed=True)
+        return job_ids
+
+    def _start(self, job_id: str, resumed: bool = False):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.concurrency))
+            self._changed = asyncio.Condition()
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, resumed))
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _emit(self, job_id: str, event: dict):
+        self._last_seq[job_id] = await asyncio.to_thread(self.store.append_event, job_id, event)
+        await self._notify()
+
+    async def _run(self, job_id: str, resumed: bool):
+        try:
+            async with self._semaphore:
+                await asyncio.to_thread(self.store.set_status, job_id, RUNNING)
+                if resumed:
+                    # Script deltas sent before the interruption are superseded by the rerun.
+                    await self._emit(job_id, {'type': 'script_reset'})
+                text = (await asyncio.to_thread(self.store.get, job_id))["text"]
+                result = None
+                stages = await JobStages.load(self.store, job_id)
+                try:
+                    async for event in run_pipeline(text, stages):
+                        if event["type"] == "script":
+                            result = event["content"]
+                        await self._emit(job_id, event)
+                finally:
+                    # Completed stages must be on disk before the job is marked done or failed.
+                    await asyncio.shield(stages.flush())
+                await asyncio.to_thread(self.store.set_status, job_id, DONE, result)
+        except asyncio.CancelledError:
+            # Shutdown: leave the job "running" so the next start resumes it.
+            raise
+        except Exception as e:
+            await self._emit(job_id, {'type': 'error', 'message': str(e)})
+            await asyncio.to_thread(self.store.set_status, job_id, FAILED, None, str(e))
+        finally:
+            self._tasks.pop(job_id, None)
+            self._last_seq.pop(job_id, None)
+            await self._notify()
+
+    async def events(self, job_id: str, after: int = 0):
+        """
+        Yield (seq, event) for events after `after`, following the job until it
+        finishes. Jobs run by another worker process are followed by polling.
+        """
+        while True:
+            for seq, event in await asyncio.to_thread(self.store.events_after, job_id, after):
+                after = seq
+                yield seq, event
+            if job_id in self._tasks:
+                async with self._changed:
+                    await self._changed.wait_for(
+                        lambda: self._last_seq.get(job_id, 0) > after or job_id not in self._tasks
+                    )
+            elif await asyncio.to_thread(self.store.running_elsewhere, job_id):
+                await asyncio.sleep(JOBS_POLL_SECONDS)
+            else:
+                # It may have finished in another process since the read above.
+                for seq, event in await asyncio.to_thread(self.store.events_after, job_id, after):
+                    yield seq, event
+                return
+
+    async def aclose(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_store = JobStore(os.getenv("JOBS_DB_PATH", os.path.join(".cache", "jobs.sqlite3")))
+jobs = JobManager(job_store)
@@ -0,0 +1,239 @@
+import contextvars
+import math
+import os
+import re
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [pair for pair in extra if pair]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, worker: str = "") -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key, worker)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self, worker: str = "") -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, worker, le)} {bucket_count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key, worker)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key, worker)} {count}")
+        return lines
+
+
+upstream_seconds = Histogram(
+    "stockast_upstream_request_seconds", "Duration of upstream calls, including cache lookups.",
+    ("upstream", "operation", "cache"),
+)
+upstream_bytes = Histogram(
+    "stockast_upstream_response_bytes", "Size of upstream responses.",
+    ("upstream", "operation"), buckets=BYTES_BUCKETS,
+)
+upstream_errors = Counter(
+    "stockast_upstream_errors_total", "Upstream calls that raised.", ("upstream", "operation"),
+)
+llm_tokens = Counter(
+    "stockast_llm_tokens_total", "Tokens reported by Mistral, by model and kind (prompt or completion).",
+    ("model", "kind"),
+)
+stage_seconds = Histogram(
+    "stockast_pipeline_stage_seconds", "Duration of podcast pipeline stages.", ("stage",),
+)
+
+REGISTRY = [upstream_seconds, upstream_bytes, upstream_errors, llm_tokens, stage_seconds]
+
+# Calls made while serving one pipeline run, for its per-request timing event.
+_request_calls = contextvars.ContextVar("request_calls", default=None)
+
+
+class Span:
+    """One upstream call. Set `cache`, `bytes` and `tokens()` on it before it ends."""
+
+    def __init__(self, upstream: str, operation: str):
+        self.upstream = upstream
+        self.operation = operation
+        self.cache = "none"
+        self.bytes = None
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.seconds = None
+
+    def tokens(self, usage):
+        """Record token counts from a Mistral usage dict, if there is one."""
+        if not usage:
+            return
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        upstream_seconds.observe(self.seconds, upstream=self.upstream, operation=self.operation, cache=self.cache)
+        if exc_type is not None and issubclass(exc_type, Exception):  # not cancellation or generator close
+            upstream_errors.inc(upstream=self.upstream, operation=self.operation)
+        if self.bytes is not None:
+            upstream_bytes.observe(self.bytes, upstream=self.upstream, operation=self.operation)
+        if self.prompt_tokens:
+            llm_tokens.inc(self.prompt_tokens, model=self.operation, kind="prompt")
+        if self.completion_tokens:
+            llm_tokens.inc(self.completion_tokens, model=self.operation, kind="completion")
+        calls = _request_calls.get()
+        if calls is not None:
+            calls.append(self)
+        return False
+
+
+def track(upstream: str, operation: str) -> Span:
+    """`with track("firecrawl", "scrape") as span:` around an upstream call."""
+    return Span(upstream, operation)
+
+
+class RequestTimings:
+    """
+    Collects stage durations and the upstream calls made during one pipeline
+    run. Calls from tasks and threads started inside `collect()` are included,
+    since they inherit the context.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.calls = []
+        self._started = time.perf_counter()
+
+    def collect(self):
+        """Start recording calls made in this context; pass the result to stop()."""
+        return _request_calls.set(self.calls)
+
+    @staticmethod
+    def stop(token):
+        try:
+            _request_calls.reset(token)
+        except ValueError:
+            # Resumed in another context (e.g. the generator was closed elsewhere); nothing leaks past it.
+            pass
+
+    def stage(self, name: str):
+        return _Stage(self, name)
+
+    def summary(self) -> dict:
+        upstreams = {}
+        for span in self.calls:
+            entry = upstreams.setdefault(span.upstream, {"calls": 0, "cache_hits": 0, "seconds": 0.0, "bytes": 0, "tokens": 0})
+            entry["calls"] += 1
+            entry["cache_hits"] += span.cache == "hit"
+            entry["seconds"] += span.seconds or 0.0
+            entry["bytes"] += span.bytes or 0
+            entry["tokens"] += (span.prompt_tokens or 0) + (span.completion_tokens or 0)
+        for entry in upstreams.values():
+            entry["seconds"] = round(entry["seconds"], 3)
+        return {
+            "stages_ms": {name: round(seconds * 1000) for name, seconds in self.stages.items()},
+            "total_ms": round((time.perf_counter() - self._started) * 1000),
+            "upstreams": upstreams,
+        }
+
+
+class _Stage:
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        self.timings.stages[self.name] = self.timings.stages.get(self.name, 0.0) + seconds
+        stage_seconds.observe(seconds, stage=self.name)
+        return False
+
+
+def _gauges(prefix: str, stats: dict, worker: str = "") -> list[str]:
+    lines = []
+    for key, value in stats.items():
+        name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            if isinstance(value, dict):
+                lines += _gauges(name, value, worker)
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{_labels((), (), worker)} {_number(value)}")
+    return lines
+
+
+def render(gauges: dict | None = None) -> str:
+    """
+    Prometheus text exposition of every metric, plus `gauges` flattened from
+    nested stats dicts. Each process keeps its own counters, so every series
+    carries a `worker` label (the pid) and scrapes that land on different
+    workers stay separate series; sum over `worker` for host totals.
+    """
+    worker = f'worker="{os.getpid()}"'
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render(worker)
+    for prefix, stats in (gauges or {}).items():
+        lines += _gauges(f"stockast_{prefix}", stats, worker)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,123 @@
+import asyncio
+import math
+import os
+import re
+
+# Input budget for the podcast prompt, in estimated tokens.
+PODCAST_INPUT_TOKENS = int(os.getenv("PODCAST_INPUT_TOKENS", "12000"))
+# Mistral's tokenizer averages a little under four characters per token on English
+# prose; numbers and tickers tokenize worse, so estimate on the high side.
+CHARS_PER_TOKEN = 3.5
+# Set PODCAST_CONDENSE=1 to summarize oversized segments with a fast model instead of cutting them.
+CONDENSE_SEGMENTS = os.getenv("PODCAST_CONDENSE") == "1"
+# A segment that would be cut below this many tokens is dropped instead.
+MIN_SEGMENT_TOKENS = 60
+
+# Higher keeps more of its text when the budget is tight.
+PRIORITIES = {
+    "keyfacts": 50,
+    "technical": 40,
+    "news": 30,
+    "sector": 20,
+    "market": 10,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class Segment:
+    """One piece of podcast input, e.g. ("news", "AAPL", text)."""
+
+    def __init__(self, kind: str, key: str, text: str, priority: int | None = None):
+        self.kind = kind
+        self.key = key
+        self.text = text or ""
+        self.priority = PRIORITIES.get(kind, 0) if priority is None else priority
+
+    @property
+    def label(self) -> str:
+        return f"{self.kind}:{self.key}"
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+def trim_text(text: str, max_tokens: int) -> str:
+    """Cut `text` to about `max_tokens`, at the last sentence end that fits when there is one."""
+    limit = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    ends = [m.end() for m in re.finditer(r"[.!?](?=\s)", cut)]
+    if ends and ends[-1] > limit // 2:
+        cut = cut[:ends[-1]]
+    return cut.rstrip() + "\n"
+
+
+def _allowances(segments: list[Segment], budget: int) -> dict[int, int]:
+    """Token allowance for each segment that must shrink, taking the lowest priority (then latest) first."""
+    excess = sum(segment.tokens for segment in segments) - budget
+    allowances = {}
+    by_priority = sorted(range(len(segments)), key=lambda i: (segments[i].priority, -i))
+    for i in by_priority:
+        if excess <= 0:
+            break
+        tokens = segments[i].tokens
+        if tokens == 0:
+            continue
+        allowed = tokens - excess
+        allowances[i] = allowed if allowed >= MIN_SEGMENT_TOKENS else 0
+        excess -= tokens - allowances[i]
+    return allowances
+
+
+def _report(segments, packed, allowances, budget) -> dict:
+    return {
+        "budget_tokens": budget,
+        "tokens_before": sum(segment.tokens for segment in segments),
+        "tokens_after": sum(estimate_tokens(text) for text in packed),
+        "trimmed": [segments[i].label for i, allowed in allowances.items() if allowed],
+        "dropped": [segments[i].label for i, allowed in allowances.items() if not allowed],
+    }
+
+
+def pack(segments: list[Segment], budget: int = PODCAST_INPUT_TOKENS):
+    """
+    Join segments in their given order, keeping the estimated total within
+    `budget`. Lowest-priority segments are trimmed first, and dropped when
+    less than MIN_SEGMENT_TOKENS of them would remain. Returns (text, report).
+    """
+    allowances = _allowances(segments, budget)
+    packed = []
+    for i, segment in enumerate(segments):
+        if i not in allowances:
+            packed.append(segment.text)
+        elif allowances[i]:
+            packed.append(trim_text(segment.text, allowances[i]))
+    return "".join(packed), _report(segments, packed, allowances, budget)
+
+
+async def apack(segments: list[Segment], budget: int = PODCAST_INPUT_TOKENS, condense=None):
+    """
+    Like pack(), but segments that must shrink are first handed to
+    `condense(text, max_tokens)` (e.g. a fast summarization call), all at
+    once. Results that still don't fit, or that fail, are trimmed instead.
+    """
+    if condense is None:
+        return pack(segments, budget)
+    allowances = _allowances(segments, budget)
+    shrink = [i for i, allowed in allowances.items() if allowed]
+    condensed = await asyncio.gather(
+        *(condense(segments[i].text, allowances[i]) for i in shrink), return_exceptions=True
+    )
+    replaced = list(segments)
+    for i, text in zip(shrink, condensed):
+        if isinstance(text, str) and text.strip():
+            replaced[i] = Segment(segments[i].kind, segments[i].key, text.strip() + "\n", segments[i].priority)
+    text, report = pack(replaced, budget)
+    report["tokens_before"] = sum(segment.tokens for segment in segments)
+    report["condensed"] = [segments[i].label for i, text in zip(shrink, condensed) if isinstance(text, str) and text.strip()]
+    return text, report
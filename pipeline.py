@@ -0,0 +1,203 @@
+import asyncio
+import os
+import time
+
+from metrics import RequestTimings
+from shared import LiveRequests
+
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "6"))
+
+# Pipelines and batches running in any worker on this host; background work backs off while any are.
+live_requests = LiveRequests(os.getenv("LIVE_REQUESTS_DIR", os.path.join(".cache", "live")))
+
+
+async def fan_out(branches, limit: int = FANOUT_CONCURRENCY):
+    """
+    Run (label, fn, *args) branches concurrently, at most `limit` at a time.
+
+    Yields (index, label, result, error) as each branch finishes, so callers can
+    report progress right away and still reassemble results in input order.
+    Synchronous functions are run in worker threads.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index, label, fn, args):
+        async with semaphore:
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    result = await fn(*args)
+                else:
+                    result = await asyncio.to_thread(fn, *args)
+                return index, label, result, None
+            except Exception as e:
+                return index, label, None, e
+
+    tasks = [
+        asyncio.create_task(run(index, label, fn, args))
+        for index, (label, fn, *args) in enumerate(branches)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client may disconnect mid-stream; don't leave upstream work running.
+        for task in tasks:
+            task.cancel()
+
+
+def research_branches(keys, sectors, markets):
+    """
+    (label, fn, *args) research branches for these tickers, sectors and
+    markets, and the result slot each one fills: a (kind, key) pair, or just
+    the kind for batched branches that return {key: text}.
+    """
+    from scrape import aget_keyfacts_batch, aget_news, get_technical_summaries, aget_sector_news, aget_market_news
+
+    branches, targets = [], []
+    if keys:
+        branches.append(("Key facts", aget_keyfacts_batch, keys))
+        targets.append("keyfacts")
+        branches.append(("Technical summaries", get_technical_summaries, keys))
+        targets.append("technical")
+    for key in keys:
+        branches.append((f"News for {key}", aget_news, key))
+        targets.append(("news", key))
+    for sec in sectors:
+        branches.append((f"Sector news for {sec}", aget_sector_news, sec))
+        targets.append(("sector", sec))
+    for market in markets:
+        branches.append((f"Market news for {market}", aget_market_news, market))
+        targets.append(("market", market))
+    return branches, targets
+
+
+def store_result(results: dict, target, result):
+    """Record a branch result under its (kind, key) slots."""
+    if isinstance(result, dict):
+        results.update({(target, key): text for key, text in result.items()})
+    else:
+        results[target] = result
+
+
+async def pack_research(intent: dict, results: dict):
+    """Pack the research for one request's intent into the podcast prompt budget; returns (text, report)."""
+    from scrape import acondense
+    from packer import Segment, apack, CONDENSE_SEGMENTS
+
+    # Segments are joined in this order, however the branches finish.
+    order = []
+    for key in intent["tickers"]:
+        order += [("keyfacts", key), ("technical", key), ("news", key)]
+    order += [("sector", sec) for sec in intent["sectors"]]
+    order += [("market", market) for market in intent["markets"]]
+    segments = [Segment(kind, key, results.get((kind, key))) for kind, key in order]
+    return await apack(segments, condense=acondense if CONDENSE_SEGMENTS else None)
+
+
+async def run_pipeline(text: str, stages=None):
+    """
+    Run the podcast pipeline for `text`, yielding the event dicts sent to clients.
+
+    Completed stage outputs are written to `stages` (any mapping) as they
+    finish: "intent", one "branch:<label>" per research branch, and "script".
+    A stage already present there is not run again, so passing the mapping of
+    an interrupted run resumes it from its last completed stage.
+    """
+    timings = RequestTimings()
+    token = timings.collect()
+    try:
+        with live_requests.track():
+            async for event in _run_pipeline(text, {} if stages is None else stages, timings):
+                yield event
+    finally:
+        RequestTimings.stop(token)
+
+
+async def _run_pipeline(text: str, stages, timings: RequestTimings):
+    from scrape import aunderstand_request, astream_podcast, ScriptStreamFilter
+
+    yield {'type': 'log', 'message': 'Analyzing Market Trends...'}
+    if "intent" not in stages:
+        with timings.stage("intent"):
+            stages["intent"] = await aunderstand_request(text)
+    intent = stages["intent"]
+    keys = intent["tickers"]
+
+    yield {'type': 'log', 'message': 'Gathering Financial Data...'}
+    sectors = intent["sectors"]
+    markets = intent["markets"]
+
+    yield {'type': 'log', 'message': 'Generating Comprehensive Analysis...'}
+
+    branches, targets = research_branches(keys, sectors, markets)
+    results = {}
+    pending = []
+    for index, branch in enumerate(branches):
+        done = stages.get(f"branch:{branch[0]}")
+        if done is not None:
+            store_result(results, targets[index], done)
+            yield {'type': 'log', 'message': f"{branch[0]} retrieved."}
+        else:
+            pending.append(index)
+
+    with timings.stage("research"):
+        async for position, label, result, error in fan_out([branches[i] for i in pending]):
+            index = pending[position]
+            if error is not None:
+                message = f"{label} failed: {error}"
+            else:
+                store_result(results, targets[index], result)
+                if result is not None:
+                    stages[f"branch:{label}"] = result
+                message = f"{label} retrieved."
+            yield {'type': 'log', 'message': message}
+    with timings.stage("pack"):
+        summary, packing = await pack_research(intent, results)
+    if packing["trimmed"] or packing["dropped"] or packing.get("condensed"):
+        yield {'type': 'log', 'message': (
+            f"Fitted research into {packing['tokens_after']} of {packing['budget_tokens']} tokens "
+            f"(from {packing['tokens_before']})."
+        )}
+
+    yield {'type': 'log', 'message': 'Structuring Podcast Content...'}
+    if "script" in stages:
+        podcast = stages["script"]
+        yield {'type': 'stage_timings', **timings.summary()}
+        yield {'type': 'script', 'content': podcast}
+        return
+
+    # Stream the script as it is generated, without the thinking section.
+    script_filter = ScriptStreamFilter()
+    parts = []
+    started = time.perf_counter()
+    first_token = first_script = None
+    with timings.stage("podcast"):
+        async for delta in astream_podcast(summary):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+                yield {'type': 'log', 'message': 'Generating Podcast Script...'}
+            parts.append(delta)
+            text = script_filter.feed(delta)
+            if text:
+                if first_script is None:
+                    first_script = time.perf_counter() - started
+                yield {'type': 'script_delta', 'content': text}
+    text = script_filter.finish()
+    if text:
+        if first_script is None:
+            first_script = time.perf_counter() - started
+        yield {'type': 'script_delta', 'content': text}
+    podcast = "".join(parts)
+    stages["script"] = podcast
+
+    yield {
+        'type': 'timing',
+        'stage': 'podcast',
+        'ttft_ms': round(first_token * 1000) if first_token is not None else None,
+        'first_script_ms': round(first_script * 1000) if first_script is not None else None,
+        'total_ms': round((time.perf_counter() - started) * 1000),
+    }
+    # Where this request's time went, by stage and by upstream.
+    yield {'type': 'stage_timings', **timings.summary()}
+
+    yield {'type': 'script', 'content': podcast}
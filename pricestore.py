@@ -0,0 +1,198 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import track
+from shared import FileLock
+from upstream import get_upstreams
+
+# One float64 row per field; row 0 holds the bar date as days since the epoch.
+FIELDS = ("date", "open", "high", "low", "close", "adj_close", "volume")
+YF_FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+CLOSE = FIELDS.index("close")
+
+
+def yf_download(tickers: list[str], start: pd.Timestamp) -> pd.DataFrame:
+    with track("yfinance", "download") as span:
+        data = get_upstreams().yf_download(tickers, start.strftime("%Y-%m-%d"))
+        span.bytes = int(data.memory_usage(deep=False).sum()) if data is not None else 0
+        return data
+
+
+def _window_start(months: int, now: pd.Timestamp | None) -> pd.Timestamp:
+    now = pd.Timestamp.now().normalize() if now is None else pd.Timestamp(now).normalize()
+    return now - pd.DateOffset(months=months)
+
+
+def _close_series(ticker: str, bars: np.ndarray, start: pd.Timestamp) -> pd.Series:
+    """Zero-copy close series for bars on or after `start`."""
+    days = bars[0]
+    first = int(np.searchsorted(days, (start - pd.Timestamp(0)).days))
+    index = pd.to_datetime(days[first:].astype("int64"), unit="D")
+    return pd.Series(bars[CLOSE, first:], index=index, name=ticker, copy=False)
+
+
+class MemmapPriceStore:
+    """
+    Daily OHLCV history kept on disk as one memory-mapped .npy file per symbol.
+
+    Reads map the file and hand out views, so nothing is copied. On each read a
+    symbol is topped up from its last stored bar (re-fetching that bar, which
+    may have been incomplete), at most once per `refresh_seconds`. A stale
+    symbol is updated under its own lock file, so worker processes sharing
+    the directory download it once and never interleave their writes, while
+    reads of fresh symbols never wait. A failed download leaves the stored
+    bars in place. Pass
+    `downloader=None` to serve only what is already on disk, e.g. from a
+    fixture directory in tests.
+    """
+
+    def __init__(self, root: str, downloader=yf_download, refresh_seconds: float = 900):
+        self.root = root
+        self.downloader = downloader
+        self.refresh_seconds = refresh_seconds
+        os.makedirs(root, exist_ok=True)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _path(self, ticker: str, ext: str) -> str:
+        return os.path.join(self.root, ticker.replace("/", "_") + ext)
+
+    def load(self, ticker: str) -> np.ndarray | None:
+        try:
+            return np.load(self._path(ticker, ".npy"), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+
+    def _meta(self, ticker: str) -> dict:
+        try:
+            with open(self._path(ticker, ".json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self, ticker: str, bars: np.ndarray, covered_from: pd.Timestamp):
+        path = self._path(ticker, ".npy")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=np.float64))
+        os.replace(tmp, path)
+        meta = {"covered_from": covered_from.strftime("%Y-%m-%d"), "fetched_at": time.time()}
+        tmp = self._path(ticker, f".json.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(ticker, ".json"))
+
+    def _fetch_start(self, ticker: str, start: pd.Timestamp):
+        """Date to download from for `ticker`, or None if it is up to date."""
+        meta = self._meta(ticker)
+        bars = self.load(ticker)
+        covered_from = meta.get("covered_from")
+        if bars is None or bars.shape[1] == 0 or covered_from is None or pd.Timestamp(covered_from) > start:
+            return start
+        if time.time() - meta.get("fetched_at", 0) < self.refresh_seconds:
+            return None
+        return pd.Timestamp(0) + pd.Timedelta(days=int(bars[0, -1]))
+
+    def _symbol_lock(self, ticker: str) -> FileLock:
+        with self._locks_lock:
+            lock = self._locks.get(ticker)
+            if lock is None:
+                lock = self._locks[ticker] = FileLock(self._path(ticker, ".lock"))
+            return lock
+
+    def _update(self, tickers: list[str], start: pd.Timestamp):
+        # Fresh symbols are served without waiting on anyone's download.
+        stale = sorted({ticker for ticker in tickers if self._fetch_start(ticker, start) is not None})
+        if not stale:
+            return
+        with contextlib.ExitStack() as locks:
+            # Sorted, so processes needing overlapping symbols cannot deadlock.
+            for ticker in stale:
+                locks.enter_context(self._symbol_lock(ticker))
+            groups = {}
+            for ticker in stale:
+                # Another worker may have fetched it while we waited for the lock.
+                fetch_from = self._fetch_start(ticker, start)
+                if fetch_from is not None:
+                    groups.setdefault(fetch_from, []).append(ticker)
+
+            for fetch_from, group in groups.items():
+                try:
+                    self._download(group, fetch_from, start)
+                except Exception as e:
+                    # Whatever is already on disk for these symbols is still served.
+                    print(f"Price store: download of {', '.join(group)} failed: {e}")
+
+    def _download(self, group: list[str], fetch_from: pd.Timestamp, start: pd.Timestamp):
+        data = self.downloader(group, fetch_from)
+        for ticker in group:
+            new = self._to_bars(data, ticker, len(group))
+            old = self.load(ticker)
+            full = old is None or fetch_from == start
+            if full:
+                bars = new
+                covered_from = start
+            else:
+                keep = old[:, old[0] < new[0, 0]] if new.shape[1] else old
+                bars = np.concatenate([keep, new], axis=1)
+                covered_from = pd.Timestamp(self._meta(ticker)["covered_from"])
+            self._save(ticker, bars, covered_from)
+
+    @staticmethod
+    def _to_bars(data: pd.DataFrame, ticker: str, group_size: int) -> np.ndarray:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(1):
+                return np.empty((len(FIELDS), 0))
+            frame = data.xs(ticker, axis=1, level=1)
+        elif group_size == 1:
+            frame = data
+        else:
+            return np.empty((len(FIELDS), 0))
+        frame = frame.reindex(columns=list(YF_FIELDS)).dropna(subset=["Close"])
+        days = (frame.index.tz_localize(None).normalize() - pd.Timestamp(0)).days.to_numpy(dtype=np.float64)
+        return np.vstack([days, frame.to_numpy(dtype=np.float64).T])
+
+    def closes(self, tickers: list[str], months: int = 3, now=None) -> dict[str, pd.Series]:
+        """Daily closes for the last `months`, fetching only what is missing."""
+        start = _window_start(months, now)
+        if self.downloader is not None:
+            self._update(tickers, start)
+        result = {}
+        for ticker in tickers:
+            bars = self.load(ticker)
+            result[ticker] = _close_series(ticker, bars, start) if bars is not None else pd.Series(dtype=float, name=ticker)
+        return result
+
+
+class StaticPriceStore:
+    """In-memory store over fixed close series; never touches the network."""
+
+    def __init__(self, closes: dict[str, pd.Series]):
+        self._closes = closes
+
+    def closes(self, tickers: list[str], months: int = 3, now=None) -> dict[str, pd.Series]:
+        start = _window_start(months, now)
+        empty = pd.Series(dtype=float)
+        return {t: self._closes.get(t, empty)[lambda s: s.index >= start].rename(t) for t in tickers}
+
+
+price_store = MemmapPriceStore(
+    os.getenv("PRICE_STORE_DIR", os.path.join(".cache", "prices")),
+    refresh_seconds=float(os.getenv("PRICE_STORE_REFRESH_SECONDS", "900")),
+)
+
+
+def get_price_store():
+    return price_store
+
+
+def set_price_store(store):
+    """Swap the store used for technical summaries, e.g. for a fixture dataset."""
+    global price_store
+    price_store = store
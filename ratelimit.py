@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """An upstream answered 429 (or its equivalent) after all retries."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(response) -> float | None:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_limit_info(exc: Exception):
+    """Return (is_rate_limited, retry_after) for errors raised by our upstream clients."""
+    if isinstance(exc, RateLimitExceeded):
+        return True, exc.retry_after
+    if type(exc).__name__ == "RateLimitError":  # aci._exceptions.RateLimitError
+        return True, None
+    response = getattr(exc, "raw_response", None)
+    if response is None:
+        response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status == 429:
+        return True, _retry_after(response)
+    return False, None
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket shared by every call to one upstream.
+
+    Callers reserve a token and wait only if the bucket is empty. A 429 halves
+    the refill rate (down to `min_rate`) and pauses the bucket for the
+    server's Retry-After, or for one token interval when none is given. Each
+    success nudges the rate back up toward the configured value.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, min_rate: float | None = None, max_retries: int = 3):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.max_retries = max_retries
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "waits": 0, "waited_seconds": 0.0, "rate_limited": 0}
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+            self.counters["calls"] += 1
+            if wait > 0:
+                self.counters["waits"] += 1
+                self.counters["waited_seconds"] += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_rate_limited(self, retry_after: float | None = None) -> float:
+        with self._lock:
+            self.counters["rate_limited"] += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            return pause
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn` under the limiter, retrying on 429 up to `max_retries` times."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                limited, retry_after = rate_limit_info(e)
+                if not limited or attempt == self.max_retries:
+                    raise
+                self.on_rate_limited(retry_after)
+                continue
+            self.on_success()
+            return result
+
+    async def acall(self, afn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire()
+            try:
+                result = await afn(*args, **kwargs)
+            except Exception as e:
+                limited, retry_after = rate_limit_info(e)
+                if not limited or attempt == self.max_retries:
+                    raise
+                self.on_rate_limited(retry_after)
+                continue
+            self.on_success()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "rate": self.rate, "max_rate": self.max_rate, "burst": self.burst}
+
+
+# Limits are for the whole host; each API worker process gets an equal share.
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def _from_env(name: str, default: str) -> AdaptiveTokenBucket:
+    """RATE_LIMIT_<NAME>="<requests per second>:<burst>"."""
+    rate, burst = os.getenv(f"RATE_LIMIT_{name.upper()}", default).split(":")
+    return AdaptiveTokenBucket(name, rate=float(rate) / WORKERS, burst=max(1.0, float(burst) / WORKERS))
+
+
+limiters = {
+    "firecrawl": _from_env("firecrawl", "2:5"),     # Firecrawl scrapes through ACI
+    "mistral": _from_env("mistral", "2:5"),
+    "elevenlabs": _from_env("elevenlabs", "2:3"),
+}
@@ -1,534 +1,773 @@
 import os, json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from aci import ACI
-from aci.meta_functions import ACISearchFunctions
-from aci.types.functions import FunctionDefinitionFormat
-from mistralai import Mistral
-from rich import print as rprint
-from rich.panel import Panel
-import yfinance as yf
-import pandas as pd
-import pandas_ta as ta
-import ast 
-import time
+from cache import scrape_cache, llm_cache, summary_cache
+from ratelimit import limiters, RateLimitExceeded
+from singleflight import flights
+from pipeline import fan_out
+from metrics import track
+from upstream import get_upstreams
 
 load_dotenv()                                 
 
-aci     = ACI(api_key=os.getenv("ACI_API_KEY"))
-mistral = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
 
 
-def get_keyfacts(ticker: str) -> str:
+def _firecrawl_body(url: str) -> dict:
+    return {
+        "body": {
+            "url": url,
+            "formats": ["markdown"],
+            "onlyMainContent": True,
+            "blockAds": True,
+        }
+    }
+
+def _check_scrape(scrape_result: dict) -> dict:
+    """Raise for failed scrapes; Firecrawl's own 429s come back as an error string."""
+    if not scrape_result.get("success", True):
+        error = str(scrape_result.get("error"))
+        if "429" in error or "rate limit" in error.lower():
+            raise RateLimitExceeded(error)
+        raise RuntimeError(f"Scrape failed: {error}")
+    return scrape_result
+
+def _fetch_scrape(url: str) -> str:
+    def call():
+        return _check_scrape(get_upstreams().firecrawl_scrape(_firecrawl_body(url)))
+
+    scrape_result = limiters["firecrawl"].call(call)
+    return scrape_result["data"]["data"]["markdown"]  # ← actual page text
+
+async def _afetch_scrape(url: str) -> str:
+    async def call():
+        return _check_scrape(await get_upstreams().afirecrawl_scrape(_firecrawl_body(url)))
+
+    scrape_result = await limiters["firecrawl"].acall(call)
+    return scrape_result["data"]["data"]["markdown"]
+
+# Cache misses for the same page, from any number of concurrent requests, share one scrape.
+def _scrape(url: str) -> str:
+    body = _firecrawl_body(url)
+    key = scrape_cache.key(url, body)
+    with track("firecrawl", "scrape") as span:
+        span.cache = "hit"
+
+        def fetch():
+            span.cache = "miss"
+            return flights["scrape"].do(key, lambda: _fetch_scrape(url))
+
+        page = scrape_cache.get_or_fetch(url, body, fetch)
+        span.bytes = len(page.encode("utf-8"))
+        return page
+
+async def _ascrape(url: str) -> str:
+    body = _firecrawl_body(url)
+    key = scrape_cache.key(url, body)
+    with track("firecrawl", "scrape") as span:
+        span.cache = "hit"
+
+        def fetch():
+            span.cache = "miss"
+            return flights["scrape"].ado(key, lambda: _afetch_scrape(url))
+
+        page = await scrape_cache.aget_or_fetch(url, body, fetch)
+        span.bytes = len(page.encode("utf-8"))
+        return page
+
+def _chat(model: str, system: str, user: str, fresh: bool = False, **kwargs) -> str:
+    """Run a chat completion, reusing an identical earlier response unless `fresh`."""
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    key = llm_cache.key(model, messages, kwargs.get("response_format"))
+    with track("mistral", model) as span:
+        if fresh:
+            llm_cache.bypass()
+        else:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                span.cache = "hit"
+                return cached
+        span.cache = "miss"
+
+        def call():
+            resp = limiters["mistral"].call(get_upstreams().mistral_complete, model=model, messages=messages, **kwargs)
+            span.tokens(resp["usage"])
+            content = resp["content"]
+            llm_cache.put(key, content)
+            return content
+
+        content = flights["llm"].do(key, call)
+        span.bytes = len(content.encode("utf-8"))
+        return content
+
+async def _achat(model: str, system: str, user: str, fresh: bool = False, **kwargs) -> str:
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    key = llm_cache.key(model, messages, kwargs.get("response_format"))
+    with track("mistral", model) as span:
+        if fresh:
+            llm_cache.bypass()
+        else:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                span.cache = "hit"
+                return cached
+        span.cache = "miss"
+
+        async def call():
+            resp = await limiters["mistral"].acall(get_upstreams().amistral_complete, model=model, messages=messages, **kwargs)
+            span.tokens(resp["usage"])
+            content = resp["content"]
+            await llm_cache.aput(key, content)
+            return content
+
+        content = await flights["llm"].ado(key, call)
+        span.bytes = len(content.encode("utf-8"))
+        return content
+
+async def _astream_chat(model: str, system: str, user: str, fresh: bool = False, **kwargs):
+    """Yield completion text as it arrives; a cached response comes back as one piece."""
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    key = llm_cache.key(model, messages, kwargs.get("response_format"))
+    if fresh:
+        llm_cache.bypass()
+    else:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            with track("mistral", model) as span:
+                span.cache = "hit"
+            yield cached
+            return
 
-    scrape_result = aci.handle_function_call(
-        "FIRECRAWL__SCRAPE",
-        {
-            "body": {
-                "url": f"https://finance.yahoo.com/quote/{ticker}", 
-                "formats": ["markdown"],
-                "onlyMainContent": True,
-                "blockAds": True,
-            }
-        },
-        "lamas"  # Firecrawl account name in ACI
+    # The span covers the whole stream; the consumer's own time between deltas is included.
+    with track("mistral", model) as span:
+        span.cache = "miss"
+        chunks = await limiters["mistral"].acall(get_upstreams().amistral_stream, model=model, messages=messages, **kwargs)
+        parts = []
+        async for chunk in chunks:
+            span.tokens(chunk["usage"])
+            if chunk["text"]:
+                parts.append(chunk["text"])
+                yield chunk["text"]
+        content = "".join(parts)
+        span.bytes = len(content.encode("utf-8"))
+    await llm_cache.aput(key, content)
+
+async def aclose_clients():
+    await get_upstreams().aclose()
+
+def warm_up():
+    """
+    Load the libraries and clients that are otherwise deferred to first use
+    (numpy, pandas, yfinance, the upstream SDKs), so the first request after
+    start-up doesn't pay for them.
+    """
+    import numpy, pandas, yfinance, yfinance.data  # noqa: F401
+    import indicators, pricestore  # noqa: F401
+
+    adapter = get_upstreams()
+    if hasattr(adapter, "warm_up"):
+        adapter.warm_up()
+
+
+KEYFACTS_PROMPT = (
+    "You are given Yahoo Finance page content in Markdown of a specific ticker. "
+    "Key numbers of interest of the stock is"
+    "price, bid, ask, change today in percent of price"
+    "Write a free flow text summary of these key numbers."
+    "Start with a podcast introduction, welcoming the listener. "
+)
+
+def _keyfacts_from_page(ticker: str) -> str:
+    markdown = _scrape(f"https://finance.yahoo.com/quote/{ticker}")
+    return _chat("mistral-large-2411", KEYFACTS_PROMPT, markdown)
+
+async def _akeyfacts_from_page(ticker: str) -> str:
+    markdown = await _ascrape(f"https://finance.yahoo.com/quote/{ticker}")
+    return await _achat("mistral-large-2411", KEYFACTS_PROMPT, markdown)
+
+
+def get_quotes(tickers: list[str]) -> dict[str, dict]:
+    """Live quotes for several tickers from one Yahoo Finance quote request."""
+    symbols = ",".join(sorted(set(tickers)))
+    with track("yahoo", "quote"):
+        result = flights["quotes"].do(symbols, lambda: get_upstreams().yahoo_quote(symbols))
+    quotes = (result.get("quoteResponse") or {}).get("result") or []
+    return {q["symbol"]: q for q in quotes if q.get("symbol") in tickers}
+
+def _render_keyfacts(ticker: str, quote: dict) -> str | None:
+    """Key-facts text from a structured quote, or None when the essentials are missing."""
+    price = quote.get("regularMarketPrice")
+    change_pct = quote.get("regularMarketChangePercent")
+    if not isinstance(price, (int, float)) or not isinstance(change_pct, (int, float)):
+        return None
+
+    name = quote.get("longName") or quote.get("shortName") or ticker
+    currency = quote.get("currency") or "USD"
+    direction = "up" if change_pct >= 0 else "down"
+    text = (
+        f"Welcome to your market update! Let's start with {name} ({ticker}). "
+        f"The stock is trading at {price:,.2f} {currency}, {direction} {abs(change_pct):.2f}% today"
     )
-    time.sleep(1)
+    previous_close = quote.get("regularMarketPreviousClose")
+    if isinstance(previous_close, (int, float)):
+        text += f" from a previous close of {previous_close:,.2f} {currency}"
+    text += ". "
+    bid, ask = quote.get("bid"), quote.get("ask")
+    if isinstance(bid, (int, float)) and isinstance(ask, (int, float)) and bid > 0 and ask > 0:
+        text += f"Right now the bid is {bid:,.2f} and the ask is {ask:,.2f}. "
+    return text
+
+def _keyfacts_from_quotes(tickers: list[str]) -> dict[str, str]:
+    """Rendered key facts for every ticker with usable quote data; the rest are left out."""
+    try:
+        quotes = get_quotes(tickers)
+    except Exception:
+        return {}
+    rendered = {ticker: _render_keyfacts(ticker, quotes.get(ticker, {})) for ticker in tickers}
+    return {ticker: text for ticker, text in rendered.items() if text}
+
+def get_keyfacts_batch(tickers: list[str]) -> dict[str, str]:
+    """Key facts for several tickers; the scrape + LLM path is only a fallback."""
+    tickers = list(dict.fromkeys(tickers))
+    facts = _keyfacts_from_quotes(tickers)
+    for ticker in tickers:
+        if ticker not in facts:
+            try:
+                facts[ticker] = _keyfacts_from_page(ticker)
+            except Exception as e:
+                facts[ticker] = f"Error fetching key facts for {ticker}: {str(e)}"
+    return {ticker: facts[ticker] for ticker in tickers}
+
+async def aget_keyfacts_batch(tickers: list[str]) -> dict[str, str]:
+    tickers = list(dict.fromkeys(tickers))
+    facts = await asyncio.to_thread(_keyfacts_from_quotes, tickers)
+    missing = [ticker for ticker in tickers if ticker not in facts]
+    # One ticker's failed fallback must not cost the others their key facts.
+    results = await asyncio.gather(*(_akeyfacts_from_page(t) for t in missing), return_exceptions=True)
+    for ticker, result in zip(missing, results):
+        if isinstance(result, Exception):
+            result = f"Error fetching key facts for {ticker}: {str(result)}"
+        facts[ticker] = result
+    return {ticker: facts[ticker] for ticker in tickers}
 
-    
+def get_keyfacts(ticker: str) -> str:
+    return get_keyfacts_batch([ticker])[ticker]
 
-    markdown = scrape_result["data"]["data"]["markdown"]  # ← actual page text
-    extract_resp = mistral.chat.complete(
-        model="mistral-large-2411",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are given Yahoo Finance page content in Markdown of a specific ticker. "
-                    "Key numbers of interest of the stock is"
-                    "price, bid, ask, change today in percent of price"
-                    "Write a free flow text summary of these key numbers."
-                    "Start with a podcast introduction, welcoming the listener. "
-                ),
-            },
-            {"role": "user", "content": markdown},
-        ],
-    )
+async def aget_keyfacts(ticker: str) -> str:
+    return (await aget_keyfacts_batch([ticker]))[ticker]
 
-    return extract_resp.choices[0].message.content 
+
+def _news_bullets_prompt(ticker: str) -> str:
+    return (
+        f"You are given the Yahoo Finance news page of the stock '{ticker}' in Markdown format.\n"
+        "Your task is to extract and summarize the key takeaways from the most recent articles.\n"
+        "Return 5–7 concise bullet points summarizing the major updates or themes regarding this stock.\n"
+        "Use plain English, keep each bullet point brief (max 2 lines). No intro or conclusion, only the bullet points."
+    )
 
 def get_news_bullets(ticker: str) -> str:
     try:
-        news_scrape = aci.handle_function_call(
-            "FIRECRAWL__SCRAPE",
-            {
-                "body": {
-                    "url": f"https://finance.yahoo.com/quote/{ticker}/news",
-                    "formats": ["markdown"],
-                    "onlyMainContent": True,
-                    "blockAds": True,
-                }
-            },
-            "lamas",
-        )
-
-        news_md = news_scrape["data"]["data"]["markdown"]
-        time.sleep(1)
-        news_resp = mistral.chat.complete(
-            model="mistral-large-2411",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are given the Yahoo Finance news page of the stock '{ticker}' in Markdown format.\n"
-                        "Your task is to extract and summarize the key takeaways from the most recent articles.\n"
-                        "Return 5–7 concise bullet points summarizing the major updates or themes regarding this stock.\n"
-                        "Use plain English, keep each bullet point brief (max 2 lines). No intro or conclusion, only the bullet points."
-                    ),
-                },
-                {"role": "user", "content": news_md},
-            ],
-        )
-
-        return news_resp.choices[0].message.content.strip()
+        news_md = _scrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+        return _chat("mistral-large-2411", _news_bullets_prompt(ticker), news_md).strip()
 
     except Exception as e:
         return f"Failed to retrieve key notes for {ticker}: {e}"
 
-def get_news(ticker: str) -> str:
+async def aget_news_bullets(ticker: str) -> str:
+    try:
+        news_md = await _ascrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+        return (await _achat("mistral-large-2411", _news_bullets_prompt(ticker), news_md)).strip()
 
-        news_scrape = aci.handle_function_call(
-            "FIRECRAWL__SCRAPE",
-            {
-                "body": {
-                    "url": f"https://finance.yahoo.com/quote/{ticker}/news",
-                    "formats": ["markdown"],
-                    "onlyMainContent": True,
-                    "blockAds": True,
-                }
-            },
-            "lamas",
-        )
-        time.sleep(1)
-        news_md = news_scrape["data"]["data"]["markdown"]
-
-
-
-        news_resp = mistral.chat.complete(
-            model="mistral-large-2411",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You receive the Yahoo Finance News page for a specific ticker. "
-                        "Write three paragraphs about the most stressing news about this stock in free text, not bullet points."
-                    ),
-                },
-                {"role": "user", "content": news_md},
-            ],
-        )
-
-
-        return news_resp.choices[0].message.content
+    except Exception as e:
+        return f"Failed to retrieve key notes for {ticker}: {e}"
 
-def get_longer_news(ticker: str) -> str:
 
+NEWS_PROMPT = (
+    "You receive the Yahoo Finance News page for a specific ticker. "
+    "Write three paragraphs about the most stressing news about this stock in free text, not bullet points."
+)
 
+def get_news(ticker: str) -> str:
+    news_md = _scrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+    return _chat("mistral-large-2411", NEWS_PROMPT, news_md)
+
+async def aget_news(ticker: str) -> str:
+    news_md = await _ascrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+    return await _achat("mistral-large-2411", NEWS_PROMPT, news_md)
+
+LONGER_NEWS_MAX_ARTICLES = 10
+LONGER_NEWS_CONCURRENCY = int(os.getenv("LONGER_NEWS_CONCURRENCY", "5"))
+
+def _links_prompt(ticker: str) -> str:
+    return (
+        f"You are given Markdown content from the Yahoo Finance news page for {ticker}. "
+        "Extract all unique URLs that appear to be links to individual news articles. "
+        "Many links on Yahoo Finance might be relative (e.g., /news/some-article-12345.html or /video/some-video-1234.html). "
+        "Convert these to absolute URLs by prepending 'https://finance.yahoo.com'. "
+        "Return a JSON object with a single key 'article_urls', where the value is a list of these absolute URLs. "
+        "Example: {'article_urls': ["'https://finance.yahoo.com/news/article1.html'"]}. "
+        "Focus on links that are clearly news articles or news-related videos. Ensure all URLs in the list are strings."
+        "Use only the first 10 articles. "
+    )
+
+ARTICLE_PROMPT = (
+    "You are given the Markdown content of a news article. "
+    "Provide a concise summary of this article in free text. Focus on the key information and main points."
+)
+
+DIGEST_PROMPT = (
+    "You are given summaries of several recent news articles about one stock. "
+    "Merge them into a single digest in free text: combine overlapping stories, drop repetition, "
+    "and keep the key facts and figures. No bullet points."
+)
+
+def _parse_article_links(raw: str) -> list[str]:
+    links = json.loads(raw).get("article_urls", [])
+    if not isinstance(links, list):
+        raise ValueError(f"Mistral did not return a list for 'article_urls': {raw}")
+    links = [str(link) for link in links if isinstance(link, str) and link.startswith("http")]
+    return list(dict.fromkeys(links))[:LONGER_NEWS_MAX_ARTICLES]
+
+def _digest_input(summaries: list[str]) -> str:
+    return "\n\n".join(f"Article {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+
+def _summarize_article(url: str) -> str | None:
+    article_md = _scrape(url)
+    return _chat("mistral-large-latest", ARTICLE_PROMPT, article_md) if article_md else None
+
+async def _asummarize_article(url: str) -> str | None:
+    article_md = await _ascrape(url)
+    return await _achat("mistral-large-latest", ARTICLE_PROMPT, article_md) if article_md else None
+
+def _panel(message: str, style: str):
+    # rich is only needed for the deep-dive news progress output; keep it out of start-up.
+    from rich import print as rprint
+    from rich.panel import Panel
+
+    rprint(Panel(message, style=style))
+
+def _reduce_summaries(summaries: list[str]) -> str:
+    if len(summaries) <= 1:
+        return "".join(summaries)
     try:
-        main_news_page_scrape = aci.handle_function_call(
-            "FIRECRAWL__SCRAPE",
-            {
-                "body": {
-                    "url": f"https://finance.yahoo.com/quote/{ticker}/news",
-                    "formats": ["markdown"], 
-                    "onlyMainContent": True, 
-                    "blockAds": True,
-                }
-            },
-            "lamas"
-        )
-        main_news_data = main_news_page_scrape.data
-
-        main_news_md = main_news_data["data"]["markdown"]
-        time.sleep(1)
-            
+        return _chat("mistral-large-latest", DIGEST_PROMPT, _digest_input(summaries))
     except Exception as e:
-        rprint(Panel(f"Failed to scrape main news page: {e}", style="bold red"))
-        return
+        _panel(f"Failed to merge article summaries: {e}", "bold red")
+        return "\n\n".join(summaries)
 
-    rprint(Panel("Extracting article links using Mistral", style="bold blue"))
-    article_links = []
+async def _areduce_summaries(summaries: list[str]) -> str:
+    if len(summaries) <= 1:
+        return "".join(summaries)
     try:
-        links_extraction_resp = mistral.chat.complete(
-            model="mistral-large-latest", 
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        f"You are given Markdown content from the Yahoo Finance news page for {ticker}. "
-                        "Extract all unique URLs that appear to be links to individual news articles. "
-                        "Many links on Yahoo Finance might be relative (e.g., /news/some-article-12345.html or /video/some-video-1234.html). "
-                        "Convert these to absolute URLs by prepending 'https://finance.yahoo.com'. "
-                        "Return a JSON object with a single key 'article_urls', where the value is a list of these absolute URLs. "
-                        "Example: {'article_urls': ["'https://finance.yahoo.com/news/article1.html'"]}. "
-                        "Focus on links that are clearly news articles or news-related videos. Ensure all URLs in the list are strings."
-                        "Use only the first 10 articles. "
-                    ),
-                },
-                {"role": "user", "content": main_news_md},
-            ],
-            response_format={"type": "json_object"} 
-        )
-        
-        extracted_content_str = links_extraction_resp.choices[0].message.content
-        extracted_data = json.loads(extracted_content_str)
-        article_links_raw = extracted_data.get("article_urls", [])
-
-        if not isinstance(article_links_raw, list):
-            rprint(Panel("Mistral did not return a list for 'article_urls'.", style="bold red"))
-            rprint(f"Mistral's response: {extracted_content_str}")
-            return
-        
-        # Ensure all links are strings and filter for absolute URLs
-        article_links = [str(link) for link in article_links_raw if isinstance(link, (str, bytes))] 
-        article_links = [link for link in article_links if link.startswith("http")] 
-
-            
-    except json.JSONDecodeError as e:
-        rprint(Panel(f"Failed to parse JSON from Mistral's link extraction response: {e}", style="bold red"))
-        if 'links_extraction_resp' in locals() and hasattr(links_extraction_resp, 'choices') and links_extraction_resp.choices:
-             rprint(f"Mistral's raw response: {links_extraction_resp.choices[0].message.content}")
+        return await _achat("mistral-large-latest", DIGEST_PROMPT, _digest_input(summaries))
+    except Exception as e:
+        _panel(f"Failed to merge article summaries: {e}", "bold red")
+        return "\n\n".join(summaries)
+
+def get_longer_news(ticker: str) -> str:
+    """
+    Deep-dive news: summarize up to ten linked articles concurrently (map), then
+    merge the summaries into one digest (reduce). A failed article is skipped.
+    """
+    try:
+        main_news_md = _scrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+    except Exception as e:
+        _panel(f"Failed to scrape main news page: {e}", "bold red")
         return
+
+    _panel("Extracting article links using Mistral", "bold blue")
+    try:
+        raw = _chat("mistral-large-latest", _links_prompt(ticker), main_news_md, response_format={"type": "json_object"})
+        article_links = _parse_article_links(raw)
     except Exception as e:
-        rprint(Panel(f"Failed to extract links using Mistral: {e}", style="bold red"))
-        if 'links_extraction_resp' in locals() and hasattr(links_extraction_resp, 'choices') and links_extraction_resp.choices:
-             rprint(f"Mistral's raw response: {links_extraction_resp.choices[0].message.content}")
+        _panel(f"Failed to extract links using Mistral: {e}", "bold red")
         return
-    summaries = ""
-    for i, link_url in enumerate(article_links):
 
-        try:
-            article_scrape_result = aci.handle_function_call(
-                "FIRECRAWL__SCRAPE",
-                {
-                    "body": {
-                        "url": link_url,
-                        "formats": ["markdown"],
-                        "onlyMainContent": True,
-                        "blockAds": True,
-                    }
-                },
-                "lamas"
-            )
-            article_data = article_scrape_result.data
-            if not article_data or "data" not in article_data or "markdown" not in article_data["data"]:
-                rprint(Panel(f"No valid data structure for {link_url}. Skipping.", style="bold yellow"))
-                error_details = article_data.get("error") if article_data else None
-                if not error_details and hasattr(article_scrape_result, 'error') and article_scrape_result.error:
-                    error_details = article_scrape_result.error
-                if error_details:
-                    rprint(f"Scraping error details: {error_details}")
-                continue
-            article_md = article_data["data"]["markdown"]
-
-            if not article_md:
-                rprint(Panel(f"No markdown content found for {link_url}. Skipping.", style="bold yellow"))
-                continue
-
-            summary_resp = mistral.chat.complete(
-                model="mistral-large-latest",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are given the Markdown content of a news article. "
-                            "Provide a concise summary of this article in free text. Focus on the key information and main points."
-                        ),
-                    },
-                    {"role": "user", "content": article_md},
-                ],
-            )
-            summary_content = summary_resp.choices[0].message.content
-            summaries = summaries + summary_content
-    
-            rprint(summary_content)
+    summaries = [None] * len(article_links)
+    with ThreadPoolExecutor(max_workers=max(1, LONGER_NEWS_CONCURRENCY)) as pool:
+        futures = {pool.submit(_summarize_article, url): i for i, url in enumerate(article_links)}
+        for future in as_completed(futures):
+            try:
+                summaries[futures[future]] = future.result()
+            except Exception as e:
+                _panel(f"Failed to process article {article_links[futures[future]]}: {e}", "bold red")
+    return _reduce_summaries([summary for summary in summaries if summary])
+
+async def aget_longer_news(ticker: str) -> str:
+    try:
+        main_news_md = await _ascrape(f"https://finance.yahoo.com/quote/{ticker}/news")
+        raw = await _achat("mistral-large-latest", _links_prompt(ticker), main_news_md, response_format={"type": "json_object"})
+        article_links = _parse_article_links(raw)
+    except Exception as e:
+        _panel(f"Failed to collect articles for {ticker}: {e}", "bold red")
+        return
 
-        except Exception as e:
-            rprint(Panel(f"Failed to process article {link_url}: {e}", style="bold red"))
-        
-    return summaries
+    summaries = [None] * len(article_links)
+    branches = [(url, _asummarize_article, url) for url in article_links]
+    async for index, url, summary, error in fan_out(branches, LONGER_NEWS_CONCURRENCY):
+        if error is not None:
+            _panel(f"Failed to process article {url}: {error}", "bold red")
+        else:
+            summaries[index] = summary
+    return await _areduce_summaries([summary for summary in summaries if summary])
+
+# Sector and market pages often come back unchanged minutes later; skip the LLM when they do.
+def _summarize_page(url: str, model: str, system: str) -> str:
+    page = _scrape(url)
+    fingerprint = summary_cache.fingerprint(page, model, system)
+    summary = summary_cache.get(url, fingerprint)
+    if summary is None:
+        summary = _chat(model, system, page)
+        summary_cache.put(url, fingerprint, summary)
+    return summary
+
+async def _asummarize_page(url: str, model: str, system: str) -> str:
+    page = await _ascrape(url)
+    fingerprint = summary_cache.fingerprint(page, model, system)
+    summary = await summary_cache.aget(url, fingerprint)
+    if summary is None:
+        summary = await _achat(model, system, page)
+        await summary_cache.aput(url, fingerprint, summary)
+    return summary
+
+SECTOR_PROMPT = (
+    "You receive the markdown content from Yahoo Finance page for a specifc SECTOR."
+    "Please write a brief summary on how the SECTOR is performing recently, fluent text no bullet points"
+)
 
 def get_sector_news(sector: str) -> str:
-    #print(f"Fetching news for sector: {sector}")
-
-    news_scrape = aci.handle_function_call(
-            "FIRECRAWL__SCRAPE",
-            {
-                "body": {
-                    "url": f"https://finance.yahoo.com/sectors/{sector}/news",
-                    "formats": ["markdown"],
-                    "onlyMainContent": True,
-                    "blockAds": True,
-                }
-            },
-            "lamas",
-        )
-
-    news_md = news_scrape["data"]["data"]["markdown"]
-    time.sleep(1)
-    news_resp = mistral.chat.complete(
-            model="mistral-large-2411",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You receive the markdown content from Yahoo Finance page for a specifc SECTOR."
-                        "Please write a brief summary on how the SECTOR is performing recently, fluent text no bullet points"
-                    ),
-                },
-                {"role": "user", "content": news_md},
-            ],
-        )
-
-
-    return news_resp.choices[0].message.content
+    return _summarize_page(f"https://finance.yahoo.com/sectors/{sector}/news", "mistral-large-2411", SECTOR_PROMPT)
+
+async def aget_sector_news(sector: str) -> str:
+    return await _asummarize_page(f"https://finance.yahoo.com/sectors/{sector}/news", "mistral-large-2411", SECTOR_PROMPT)
 
-def get_market_news(market: str) -> str:
-    news_scrape = aci.handle_function_call(
-            "FIRECRAWL__SCRAPE",
-            {
-                "body": {
-                    "url": f"https://finance.yahoo.com/markets/{market}",
-                    "formats": ["markdown"],
-                    "onlyMainContent": True,
-                    "blockAds": True,
-                }
-            },
-            "lamas",
-        )
-
-    news_md = news_scrape["data"]["data"]["markdown"]
-    time.sleep(1)
-    news_resp = mistral.chat.complete(
-            model="mistral-large-2411",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You receive the markdown content from Yahoo Finance page for a specific MARKET."
-                        "Please scrape this page and write brief summary on the news in thiss specific MARKET recently in free text, not bullet points. "
-                    ),
-                },
-                {"role": "user", "content": news_md},
-            ],
-        )
-    time.sleep(1)
-
-    return news_resp.choices[0].message.content
 
+MARKET_PROMPT = (
+    "You receive the markdown content from Yahoo Finance page for a specific MARKET."
+    "Please scrape this page and write brief summary on the news in thiss specific MARKET recently in free text, not bullet points. "
+)
+
+def get_market_news(market: str) -> str:
+    return _summarize_page(f"https://finance.yahoo.com/markets/{market}", "mistral-large-2411", MARKET_PROMPT)
+
+async def aget_market_news(market: str) -> str:
+    return await _asummarize_page(f"https://finance.yahoo.com/markets/{market}", "mistral-large-2411", MARKET_PROMPT)
+
+
+SECTORS = ['technology', 'energy', 'healthcare', 'financial-services', 'consumer-cyclical', 'communication-services', 'consumer-defensive', 'industrials', 'utilities', 'real-estate', 'basic-materials']
+MARKETS = ['world-indices', 'futures', 'bonds', 'currencies', 'options', 'stocks', 'crypto', 'private-companies', 'efts', 'mutual-funds']
+
+INTENT_PROMPT = (
+    "You are given a string, with stocks, sectors and markets of interest. "
+    "Return ONLY a JSON object with the keys 'tickers', 'sectors' and 'markets', each an array of strings. Do not return ANYTHING else. "
+    "'tickers': the stock tickers (all CAPS, no duplicates). "
+    "As an example, if the user writes that they are interested in Apple and Google, tickers should be [\"AAPL\", \"GOOGL\"]. "
+    "It can also be the case that the user asks for the three biggest tech companies, in which case you should return them. "
+    "If no companies what so ever are mentioned, it should be left empty. "
+    f"'sectors': the interesting sectors, only from this list: {SECTORS}. "
+    "As an example, if the user writes that they are interested in energy sector, sectors should be [\"energy\"]. "
+    f"'markets': the interesting MARKETS, only from this list: {MARKETS}. "
+    "As an example, if the user writes that they are interested in currencies, markets should be [\"currencies\"]. "
+    "NOTE: Sectors and markets are not tickers. They can also be empty, if there is not a apparent interest in one."
+)
+
+def _parse_intent(raw: str) -> dict:
+    """Validate the model's JSON answer, dropping anything outside the known categories."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    def strings(name):
+        values = data.get(name)
+        return [v.strip() for v in values if isinstance(v, str) and v.strip()] if isinstance(values, list) else []
+
+    tickers = []
+    for t in strings("tickers"):
+        t = t.upper()
+        if t not in tickers and len(t) <= 12 and " " not in t:
+            tickers.append(t)
+    sectors = [s for s in dict.fromkeys(v.lower() for v in strings("sectors")) if s in SECTORS]
+    markets = [m for m in dict.fromkeys(v.lower() for v in strings("markets")) if m in MARKETS]
+    return {"tickers": tickers, "sectors": sectors, "markets": markets}
+
+def understand_request(text: str) -> dict:
+    """Extract tickers, sectors and markets from the user's text in one call."""
+    raw = _chat("mistral-large-2411", INTENT_PROMPT, text, response_format={"type": "json_object"})
+    return _parse_intent(raw)
+
+async def aunderstand_request(text: str) -> dict:
+    raw = await _achat("mistral-large-2411", INTENT_PROMPT, text, response_format={"type": "json_object"})
+    return _parse_intent(raw)
+
+# Single-purpose wrappers; repeated calls for the same text hit the LLM cache.
 def understand_tickrs(text: str) -> list[str]: 
+    return understand_request(text)["tickers"]
 
-    resp = mistral.chat.complete(
-        model="mistral-large-2411",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are given a string, with stocks that wants to be examined."
-                    "Return ONLY a array of the stock tickers (all CAPS, no duplicates, comma separated). Do not return ANYTHING else. "
-                    "As an example, if the user writes that they are interested in Apple and Google, you should return [AAPl, GOOGL]."
-                    "It can also be the case that the user asks for the three biggest tech companies, in which case you should return them."
-                    "NOTE: If no companies what so ever are mentioned, it should be left empty. "
-                ),
-            },
-            {"role": "user", "content": text},
-        ],
-    )
-    time.sleep(1)
-    raw = resp.choices[0].message.content          
-    tokens = [t.strip("[] ")                       
-              for t in raw.split(",")             
-              if t.strip(" []")]                  
-    return tokens
+async def aunderstand_tickrs(text: str) -> list[str]:
+    return (await aunderstand_request(text))["tickers"]
 
 def understand_sectors(text: str) -> list[str]:
+    return understand_request(text)["sectors"]
 
-    resp = mistral.chat.complete(
-        model="mistral-large-2411",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are given a string, with stocks and sectors of interest"
-                    "Return ONLY a array of the interesting sectors, according to categories below. Do not return ANYTHING else. "
-                    "Sectors are: ['technology', 'energy', 'healthcare', 'financial-services', 'consumer-cyclical', 'communication-services', 'consumer-defensive', 'industrials', 'utilities', 'real-estate', 'basic-materials']"
-                    "As an example, if the user writes that they are interested in energy sector, you should return ['energy']."
-                    "NOTE: This is not a ticker. It can also be empty, if there is not a apparent interest in a sector."
-
-                ),
-            },
-            {"role": "user", "content": text},
-        ],
-    )
-    return resp.choices[0].message.content        
-   
-def understand_markets(text: str) -> list[str]: 
+async def aunderstand_sectors(text: str) -> list[str]:
+    return (await aunderstand_request(text))["sectors"]
 
-    resp = mistral.chat.complete(
-        model="mistral-large-2411",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are given a string, with stocks, sectors and markets of interest"
-                    "Return ONLY a array of the interesting MARKETS, according to categories below. Do not return ANYTHING else. "
-                    "Markets are: ['world-indices', 'futures', 'bonds', 'currencies', 'options', 'stocks', 'crypto', 'private-companies', 'efts', 'mutual-funds']"
-                    "As an example, if the user writes that they are interested in currencies, you should return ['currencies']."
-                    "NOTE: This is not a ticker. It can also be empty, if there is not a apparent interest in a sector."
-
-                ),
-            },
-            {"role": "user", "content": text},
-        ],
-    )
-    return resp.choices[0].message.content
-
-def generate_podcast(text: str) -> str:
+def understand_markets(text: str) -> list[str]: 
+    return understand_request(text)["markets"]
+
+async def aunderstand_markets(text: str) -> list[str]:
+    return (await aunderstand_request(text))["markets"]
+
+
+CONDENSE_PROMPT = (
+    "Shorten the following market briefing to at most {words} words. "
+    "Keep tickers, prices, percentages and dates exactly as written. Plain text only."
+)
+
+async def acondense(text: str, max_tokens: int) -> str:
+    """Summarize `text` to roughly `max_tokens`, for packing podcast input under its budget."""
+    words = max(20, int(max_tokens * 0.7))
+    return await _achat("mistral-small-latest", CONDENSE_PROMPT.format(words=words), text, max_tokens=max_tokens)
+
+PODCAST_PROMPT = (
+    "You are given a content text that summarizes the latest news about specific stocks, markets and sectors. "
+    "Generate a podcast script based on this text, making it engaging and suitable for audio format. "
+    "DO NOT USE ANY THINKING OR REASONING IN THE ANSWER, JUST GENERATE THE PODCAST SCRIPT. "
+    "Start with a catchy introduction"
+    "Keep the information of the stock, sector and market similar in length, so that the podcast is balanced. "
+    "Do absolutely not make the text longer than 8000 charachters!"
+    "Use a friendly tone, speak directly to the listener, no bullet points—free text only. "
+    "Keep it concise but informative (about 5 minutes when read aloud). "
+    "Avoid repeating information." 
+    "Only return the final podcast script."
+    "No more delimiters like [Outro] or [Intro]. "
+    "no Host:"
+    "no [Closing music] or ### Final Podcast Script" 
+    "In addition, create the thinking process of the podcast, and return it as a text via <think> and </think> tags."
+    "create the final script of the podcast, and return it as a text starting with [Final Podcast Script] and ending with [End of Podcast Script]"
+)
+
+def generate_podcast(text: str, fresh: bool = False) -> str:
     """
     Generate a podcast script from the supplied news-summary text.
+    Pass fresh=True to skip the response cache and get a new take.
     """
-    podcast_resp = mistral.chat.complete(
-        model="magistral-medium-2506",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are given a content text that summarizes the latest news about specific stocks, markets and sectors. "
-                    "Generate a podcast script based on this text, making it engaging and suitable for audio format. "
-                    "DO NOT USE ANY THINKING OR REASONING IN THE ANSWER, JUST GENERATE THE PODCAST SCRIPT. "
-                    "Start with a catchy introduction"
-                    "Keep the information of the stock, sector and market similar in length, so that the podcast is balanced. "
-                    "Do absolutely not make the text longer than 8000 charachters!"
-                    "Use a friendly tone, speak directly to the listener, no bullet points—free text only. "
-                    "Keep it concise but informative (about 5 minutes when read aloud). "
-                    "Avoid repeating information." 
-                    "Only return the final podcast script."
-                    "No more delimiters like [Outro] or [Intro]. "
-                    "no Host:"
-                    "no [Closing music] or ### Final Podcast Script" 
-                    "In addition, create the thinking process of the podcast, and return it as a text via <think> and </think> tags."
-                    "create the final script of the podcast, and return it as a text starting with [Final Podcast Script] and ending with [End of Podcast Script]"
-                ),
-            },
-            {"role": "user", "content": text},
-        ],
-    )
-    return podcast_resp.choices[0].message.content
+    return _chat("magistral-medium-2506", PODCAST_PROMPT, text, fresh=fresh)
 
-def get_technical_summary(ticker: str) -> str:
+async def agenerate_podcast(text: str, fresh: bool = False) -> str:
+    return await _achat("magistral-medium-2506", PODCAST_PROMPT, text, fresh=fresh)
 
-    """Get technical analysis summary for a given ticker."""
-    try:
-        # Download historical data
-        data = yf.download(ticker, period="3mo", interval="1d", auto_adjust= False, progress=False)
-
-        # Flatten MultiIndex columns if they exist
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = [col[0] for col in data.columns]
-
-        # Drop missing values and check if sufficient data exists
-        data = data.dropna(subset=["Close"])
-        
-        MIN_PERIODS = 26  # Minimum periods needed for all indicators
-        if len(data) < MIN_PERIODS:
-            return f"Insufficient data for {ticker}. Need at least {MIN_PERIODS} data points, got {len(data)}."
-
-        # Calculate technical indicators
-        data["RSI"] = ta.rsi(data["Close"])
-        data["SMA20"] = ta.sma(data["Close"], length=20)
-        
-        macd = ta.macd(data["Close"])
-        if macd is not None and not macd.empty:
-            required_cols = ['MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9']
-            if all(col in macd.columns for col in required_cols):
-                data = pd.concat([data, macd[required_cols]], axis=1)
+async def astream_podcast(text: str, fresh: bool = False):
+    """Yield the raw podcast completion (thinking included) as it is generated."""
+    async for delta in _astream_chat("magistral-medium-2506", PODCAST_PROMPT, text, fresh=fresh):
+        yield delta
+
+class ScriptStreamFilter:
+    """
+    Turn streamed podcast output into script text as it arrives.
+
+    Drops <think>…</think> sections and passes on only what sits between the
+    [Final Podcast Script] and [End of Podcast Script] markers. Text that could
+    be the start of a marker is held back until the next delta decides it. If
+    the model never writes the start marker, finish() returns everything
+    outside the thinking section instead.
+    """
+
+    START, END = "[final podcast script]", "[end of podcast script]"
+    THINK_OPEN, THINK_CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._preamble = ""
+        self._in_think = False
+        self._in_script = False
+        self._started = False  # emitted any script text yet
+        self._done = False
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def _safe_len(self, marker: str) -> int:
+        """How much of the buffer can be released without splitting `marker`."""
+        return max(0, len(self._buffer) - (len(marker) - 1))
+
+    def feed(self, delta: str) -> str:
+        if self._done:
+            return ""
+        self._buffer += delta
+        out = []
+        while self._buffer:
+            lower = self._buffer.lower()
+            if self._in_think:
+                end = lower.find(self.THINK_CLOSE)
+                if end < 0:
+                    self._buffer = self._buffer[self._safe_len(self.THINK_CLOSE):]
+                    break
+                self._buffer = self._buffer[end + len(self.THINK_CLOSE):]
+                self._in_think = False
+            elif self._in_script:
+                end = lower.find(self.END)
+                if end < 0:
+                    cut = self._safe_len(self.END)
+                    # Trailing whitespace waits too, in case the end marker follows it.
+                    cut = len(self._buffer[:cut].rstrip())
+                    out.append(self._emit(self._buffer[:cut]))
+                    self._buffer = self._buffer[cut:]
+                    break
+                out.append(self._emit(self._buffer[:end].rstrip()))
+                self._buffer = ""
+                self._done = True
             else:
-                return f"MACD calculation failed for {ticker}: missing columns."
+                think, start = lower.find(self.THINK_OPEN), lower.find(self.START)
+                if start >= 0 and (think < 0 or start < think):
+                    self._buffer = self._buffer[start + len(self.START):]
+                    self._in_script = True
+                elif think >= 0:
+                    self._preamble += self._buffer[:think]
+                    self._buffer = self._buffer[think + len(self.THINK_OPEN):]
+                    self._in_think = True
+                else:
+                    cut = self._safe_len(self.START)
+                    self._preamble += self._buffer[:cut]
+                    self._buffer = self._buffer[cut:]
+                    break
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Release whatever is still held back once the stream has ended."""
+        if self._done or self._in_think:
+            return ""
+        if self._in_script:
+            tail = self._buffer.rstrip()
         else:
-            return f"MACD calculation failed for {ticker}."
-
-        # Generate summary
-        latest = data.iloc[-1]
-        summary_lines = []
-
-        # Analyze price vs SMA20
-        if pd.notna(latest.get("SMA20")):
-            trend = "above" if latest["Close"] > latest["SMA20"] else "below"
-            strength = "strength" if trend == "above" else "weakness"
-            summary_lines.append(f"Trading {trend} 20-day average, indicating short-term {strength}.")
-
-        # Analyze RSI
-        if pd.notna(latest.get("RSI")):
-            rsi_val = latest["RSI"]
-            if rsi_val > 70:
-                summary_lines.append("RSI above 70 suggests the stock may be overbought.")
-            elif rsi_val < 30:
-                summary_lines.append("RSI below 30 indicates the stock might be oversold.")
-            else:
-                summary_lines.append("RSI in neutral range, showing balanced momentum.")
-
-        # Analyze MACD
-        if pd.notna(latest.get("MACD_12_26_9")):
-            momentum = "bullish" if latest["MACD_12_26_9"] > 0 else "bearish"
-            summary_lines.append(f"MACD indicates {momentum} momentum.")
-
-        # Format output
-        date_str = latest.name.date() if hasattr(latest.name, 'date') else "latest"
-        output = f"Technical Summary for {ticker} ({date_str}):\n"
-        output += f"\n Closing Price: ${latest['Close']:.2f}\n"
-        output += "\n".join(f"- {line}" for line in summary_lines)
-        
-        return output
-        
+            tail = (self._preamble + self._buffer).strip()
+        self._buffer = ""
+        self._done = True
+        return self._emit(tail)
+
+
+MIN_PERIODS = 26  # Minimum periods needed for all indicators
+
+def _format_technical_summary(ticker: str, date, close: float, sma20: float, rsi_val: float, macd_val: float) -> str:
+    import pandas as pd
+
+    summary_lines = []
+
+    # Analyze price vs SMA20
+    if pd.notna(sma20):
+        trend = "above" if close > sma20 else "below"
+        strength = "strength" if trend == "above" else "weakness"
+        summary_lines.append(f"Trading {trend} 20-day average, indicating short-term {strength}.")
+
+    # Analyze RSI
+    if pd.notna(rsi_val):
+        if rsi_val > 70:
+            summary_lines.append("RSI above 70 suggests the stock may be overbought.")
+        elif rsi_val < 30:
+            summary_lines.append("RSI below 30 indicates the stock might be oversold.")
+        else:
+            summary_lines.append("RSI in neutral range, showing balanced momentum.")
+
+    # Analyze MACD
+    if pd.notna(macd_val):
+        momentum = "bullish" if macd_val > 0 else "bearish"
+        summary_lines.append(f"MACD indicates {momentum} momentum.")
+
+    # Format output
+    date_str = date.date() if hasattr(date, 'date') else "latest"
+    output = f"Technical Summary for {ticker} ({date_str}):\n"
+    output += f"\n Closing Price: ${close:.2f}\n"
+    output += "\n".join(f"- {line}" for line in summary_lines)
+    return output
+
+def get_technical_summaries(tickers: list[str]) -> dict[str, str]:
+    """Get technical analysis summaries for several tickers with at most one download."""
+    # numpy/pandas and the price store load on first use, keeping them out of API start-up.
+    import numpy as np
+    import indicators
+    from pricestore import get_price_store
+
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    try:
+        # Daily closes for all symbols, topped up incrementally from the local store
+        with track("pricestore", "closes"):
+            closes = get_price_store().closes(tickers, months=3)
     except Exception as e:
-        return f"Error analyzing {ticker}: {str(e)}"
+        return {ticker: f"Error analyzing {ticker}: {str(e)}" for ticker in tickers}
+
+    summaries = {}
+    # Tickers can trade on different calendars; compute each set of tickers
+    # sharing the same dates as one gap-free panel.
+    groups = {}
+    for ticker in tickers:
+        series = closes[ticker]
+        if len(series) < MIN_PERIODS:
+            summaries[ticker] = f"Insufficient data for {ticker}. Need at least {MIN_PERIODS} data points, got {len(series)}."
+            continue
+        groups.setdefault(tuple(series.index), []).append(series)
+
+    for columns in groups.values():
+        try:
+            with track("numpy", "indicators"):
+                panel = np.column_stack([series.to_numpy() for series in columns])
+                latest_rsi = indicators.rsi(panel)[-1]
+                latest_sma = indicators.sma(panel, length=20)[-1]
+                latest_macd = indicators.macd(panel)[0][-1]
+            for i, series in enumerate(columns):
+                summaries[series.name] = _format_technical_summary(
+                    series.name, series.index[-1], panel[-1, i], latest_sma[i], latest_rsi[i], latest_macd[i]
+                )
+        except Exception as e:
+            for series in columns:
+                summaries[series.name] = f"Error analyzing {series.name}: {str(e)}"
+
+    return {ticker: summaries[ticker] for ticker in tickers}
+
+def get_technical_summary(ticker: str) -> str:
+    """Get technical analysis summary for a given ticker."""
+    return get_technical_summaries([ticker])[ticker]
 
 if __name__ == "__main__": 
 
     input = "I'm interested in tesla, crypto and currencies. Can you hold a less formal tone?"  
-    keys = understand_tickrs(input) 
-    sectors = understand_sectors(input) 
-    markets = understand_markets(input)
+    intent = understand_request(input)
+    keys = intent["tickers"]
+    sectors = intent["sectors"]
+    markets = intent["markets"]
 
     print(keys) 
     print(sectors)
     print(markets)
 
     summary = "" 
+    technicals = get_technical_summaries(keys)
+    keyfacts = get_keyfacts_batch(keys)
 
     for key in keys:
-        summary += get_keyfacts(key) 
+        summary += keyfacts[key]
         print(f"ℹ️ Key facts for {key} retrieved.")
-        summary += get_technical_summary(key)
-        time.sleep(1)
+        summary += technicals[key]
 
         print(f"ℹ️ Technical summary for {key} retrieved.")
         summary += get_news(key) 
-        time.sleep(1)
 
         print(f"ℹ️ News for {key} retrieved.")
 
 
-    sectors  = ast.literal_eval(sectors)   
-    markets  = ast.literal_eval(markets)  
-
     for sec in sectors:
         summary += get_sector_news(sec) 
-        time.sleep(1)
 
     
     for market in markets:
         summary += get_market_news(market)
-        time.sleep(1)
 
 
     print(summary)
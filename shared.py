@@ -0,0 +1,145 @@
+# Helpers for state shared by every worker process on one host: the caches,
+# price history and job store all live in local files, so several uvicorn
+# workers (WEB_CONCURRENCY) see the same data without any external service.
+import contextlib
+import os
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of this process
+    fcntl = None
+
+# Seconds a writer waits for another process's write transaction before giving up.
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "10"))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    SQLite connection that other processes can use on the same file at the
+    same time. WAL mode lets readers run alongside the single writer, and
+    writers queue for up to SQLITE_BUSY_TIMEOUT instead of failing.
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    db = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+    if path != ":memory:":
+        db.execute("PRAGMA journal_mode=WAL")
+        # Durable at each checkpoint rather than each commit, which is plenty for caches.
+        db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class FileLock:
+    """
+    Exclusive lock held across threads of this process and across processes
+    on the host (flock on `path`). Use as a context manager, or acquire(False)
+    to skip work another process is already doing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def pid_alive(pid: int | None) -> bool:
+    """Whether process `pid` is still running on this host."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LiveRequests:
+    """
+    Host-wide record of live requests. Each process counts its own and keeps
+    a marker file named after its pid in `root` while the count is non-zero,
+    so background work in any process can tell whether any worker is busy.
+    Markers left by processes that died are ignored and removed.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _marker(self) -> str:
+        # Looked up per call: forked workers each get their own marker.
+        return os.path.join(self.root, str(os.getpid()))
+
+    @contextlib.contextmanager
+    def track(self):
+        with self._lock:
+            self._count += 1
+            if self._count == 1:
+                os.makedirs(self.root, exist_ok=True)
+                open(self._marker(), "w").close()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._count -= 1
+                if self._count == 0:
+                    try:
+                        os.remove(self._marker())
+                    except FileNotFoundError:
+                        pass
+
+    def active(self) -> bool:
+        """Whether any process on the host is serving a live request."""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return False
+        for name in names:
+            if not name.isdigit():
+                continue
+            if pid_alive(int(name)):
+                return True
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+        return False
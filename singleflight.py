@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is running,
+    other callers with the same key wait for its outcome instead of starting
+    their own. Nothing is kept once the call finishes; caching is separate.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self.counters = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: str, fn):
+        """Return fn(), sharing one execution among threads calling with the same key."""
+        with self._lock:
+            self.counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters["executions"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.counters["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: str, afn):
+        """
+        Async variant of do(); `afn` is a coroutine function. The shared call
+        runs in its own task, so a caller that is cancelled (e.g. a client
+        disconnecting) does not cancel it for the others.
+        """
+        with self._lock:
+            self.counters["calls"] += 1
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.create_task(afn())
+                task.add_done_callback(lambda t: self._finished(key, t))
+                self.counters["executions"] += 1
+            else:
+                self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            if task.cancelled() or task.exception() is not None:
+                self.counters["errors"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.counters["calls"]
+            return {
+                **self.counters,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "coalesced_rate": self.counters["coalesced"] / calls if calls else 0.0,
+            }
+
+
+flights = {
+    "scrape": SingleFlight("scrape"),     # Firecrawl page fetches, keyed like scrape_cache
+    "llm": SingleFlight("llm"),           # chat completions, keyed like llm_cache
+    "quotes": SingleFlight("quotes"),     # batched Yahoo quote lookups, keyed by symbol set
+}
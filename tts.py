@@ -1,35 +1,236 @@
-from fastapi import FastAPI
 from pydantic import BaseModel
-import requests
 from dotenv import load_dotenv
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from ratelimit import limiters, RateLimitExceeded
+from pipeline import fan_out
+from metrics import track
+from upstream import get_upstreams
 
-app = FastAPI()
 load_dotenv()
 
 eleven_api = os.getenv("ELEVENLABS_API_KEY")
 
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75
+}
+
 class TTSRequest(BaseModel):
     text: str
     voice_id: str = "21m00Tcm4TlvDq8ikWAM"  # Default voice ID for ElevenLabs
 
-def speak_and_download(text: str, voice_id: str):
+# Bytes relayed per read when streaming; bounds memory per request regardless of audio length.
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Long-form mode: scripts longer than this are split and synthesized in parallel.
+SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", "1500"))
+SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", "3"))
+
+def _speech_request(text: str, voice_id: str, stream: bool = False, previous_text: str = None, next_text: str = None):
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    if stream:
+        url += "/stream"
     headers = {
-        "xi-api-key": eleven_api,
+        "xi-api-key": eleven_api or "",
         "Content-Type": "application/json",
         "Accept": "audio/mpeg"
     }
     payload = {
         "text": text,
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.75
-        }
+        "voice_settings": VOICE_SETTINGS
     }
+    # Neighbouring text keeps intonation continuous across segment boundaries.
+    if previous_text:
+        payload["previous_text"] = previous_text
+    if next_text:
+        payload["next_text"] = next_text
+    return url, headers, payload
+
+def _raise_if_rate_limited(response):
+    if response.status_code == 429:
+        retry_after = response.headers.get("retry-after")
+        raise RateLimitExceeded(response.text, float(retry_after) if retry_after else None)
+    return response
+
+def speak_and_download(text: str, voice_id: str, previous_text: str = None, next_text: str = None):
+    url, headers, payload = _speech_request(text, voice_id, previous_text=previous_text, next_text=next_text)
+
+    with track("elevenlabs", "speech") as span:
+        try:
+            response = limiters["elevenlabs"].call(
+                lambda: _raise_if_rate_limited(get_upstreams().elevenlabs_speech(url, headers, payload))
+            )
+        except RateLimitExceeded as e:
+            return {"error": str(e)}
+        if response.status_code != 200:
+            return {"error": response.text}
+        span.bytes = len(response.content)
+
+    return response.content;  
+
+async def aspeak_and_download(text: str, voice_id: str, previous_text: str = None, next_text: str = None):
+    url, headers, payload = _speech_request(text, voice_id, previous_text=previous_text, next_text=next_text)
+
+    async def call():
+        return _raise_if_rate_limited(await get_upstreams().aelevenlabs_speech(url, headers, payload))
+
+    with track("elevenlabs", "speech") as span:
+        try:
+            response = await limiters["elevenlabs"].acall(call)
+        except RateLimitExceeded as e:
+            return {"error": str(e)}
+        if response.status_code != 200:
+            return {"error": response.text}
+        span.bytes = len(response.content)
+
+    return response.content
+
+def split_script(text: str, max_chars: int = SEGMENT_CHARS) -> list[str]:
+    """
+    Split `text` into segments of at most `max_chars`, breaking between
+    paragraphs where possible, then between sentences, then between words.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append((sentence[:cut], " "))
+                sentence = sentence[cut:].lstrip()
+            pieces.append((sentence, " "))
+        pieces[-1] = (pieces[-1][0], "\n\n")
+
+    segments, current = [], ""
+    for piece, separator in pieces:
+        if not piece:
+            continue
+        if current and len(current) + len(piece) > max_chars:
+            segments.append(current.rstrip())
+            current = ""
+        current += piece + separator
+    if current.strip():
+        segments.append(current.rstrip())
+    return segments
 
-    response = requests.post(url, json=payload, headers=headers)
+# MPEG audio frame tables: bitrates in kbit/s by [version is MPEG-1][bitrate index], for Layer III.
+_MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def _id3v2_length(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _frame_length(data: bytes, offset: int) -> int:
+    """Length of the Layer III frame starting at `offset`, or 0 if there is none."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return 0
+    version = (data[offset + 1] >> 3) & 0x03
+    layer = (data[offset + 1] >> 1) & 0x03
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[mpeg1][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (data[offset + 2] >> 1) & 0x01
+    return (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+def _mp3_frames(data: bytes) -> bytes:
+    """
+    Audio frames of an MP3 file, without ID3 tags or the Xing/Info header
+    frame, whose frame count would otherwise make players report only the
+    first segment's duration.
+    """
+    start = _id3v2_length(data)
+    end = len(data) - 128 if len(data) >= 128 and data[-128:-125] == b"TAG" else len(data)
+    first = _frame_length(data, start)
+    if first and (b"Xing" in data[start:start + first] or b"Info" in data[start:start + first]):
+        start += first
+    return data[start:end]
+
+def stitch_mp3(parts: list[bytes]) -> bytes:
+    """Concatenate MP3 segments encoded with the same settings into one continuous file."""
+    return b"".join(_mp3_frames(part) for part in parts)
+
+def _segment_jobs(segments: list[str]):
+    for i, segment in enumerate(segments):
+        previous_text = segments[i - 1] if i > 0 else None
+        next_text = segments[i + 1] if i + 1 < len(segments) else None
+        yield segment, previous_text, next_text
+
+def speak_long(text: str, voice_id: str, max_chars: int = SEGMENT_CHARS, concurrency: int = SEGMENT_CONCURRENCY):
+    """speak_and_download for long scripts: segments are synthesized in parallel and stitched in order."""
+    segments = split_script(text, max_chars)
+    if len(segments) <= 1:
+        return speak_and_download(text, voice_id)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        parts = list(pool.map(lambda job: speak_and_download(job[0], voice_id, job[1], job[2]), _segment_jobs(segments)))
+    for part in parts:
+        if isinstance(part, dict):
+            return part
+    return stitch_mp3(parts)
+
+async def aspeak_long(text: str, voice_id: str, max_chars: int = SEGMENT_CHARS, concurrency: int = SEGMENT_CONCURRENCY):
+    segments = split_script(text, max_chars)
+    if len(segments) <= 1:
+        return await aspeak_and_download(text, voice_id)
+    parts = [None] * len(segments)
+    branches = [(i, aspeak_and_download, segment, voice_id, previous_text, next_text)
+                for i, (segment, previous_text, next_text) in enumerate(_segment_jobs(segments))]
+    async for index, _, result, error in fan_out(branches, concurrency):
+        if error is not None:
+            return {"error": str(error)}
+        if isinstance(result, dict):
+            return result
+        parts[index] = result
+    return stitch_mp3(parts)
+
+async def aopen_speech_stream(text: str, voice_id: str):
+    """
+    Start a streaming synthesis and return the open upstream response, or
+    {"error": ...} if ElevenLabs refused it. Read it with aiter_speech().
+    """
+    url, headers, payload = _speech_request(text, voice_id, stream=True)
+
+    async def call():
+        response = await get_upstreams().aelevenlabs_stream(url, headers, payload)
+        if response.status_code == 429:
+            await response.aread()
+            await response.aclose()
+            _raise_if_rate_limited(response)
+        return response
+
+    # Measures time to the first response headers; the body is relayed afterwards.
+    with track("elevenlabs", "stream_open"):
+        try:
+            response = await limiters["elevenlabs"].acall(call)
+        except RateLimitExceeded as e:
+            return {"error": str(e)}
     if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
         return {"error": response.text}
-    
-    return response.content;
\ No newline at end of file
+
+    return response
+
+async def aiter_speech(response, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Relay MP3 bytes from an open speech stream as they arrive."""
+    try:
+        async for chunk in response.aiter_bytes(chunk_size):
+            yield chunk
+    finally:
+        await response.aclose()
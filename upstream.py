@@ -0,0 +1,603 @@
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import time
+
+# Every call that leaves the process goes through one of these adapters, so the
+# pipeline can run against live services, record their responses to fixtures,
+# or replay fixtures offline (UPSTREAM_MODE=live|record|replay|synthetic).
+#
+# Adapters return plain data so responses can be written to JSON:
+#   firecrawl_scrape / afirecrawl_scrape -> ACI result dict
+#   mistral_complete / amistral_complete -> {"content": str, "usage": {...}}
+#   amistral_stream                      -> async iterator of {"text": str, "usage": {...} | None}
+#   yahoo_quote                          -> v7 quote JSON
+#   yf_download                          -> yfinance DataFrame
+#   elevenlabs_speech / aelevenlabs_speech / aelevenlabs_stream -> response with
+#       status_code, headers, content/text (the stream: aiter_bytes, aread, aclose)
+
+HTTP_TIMEOUT_SECONDS = 120.0
+FIRECRAWL_ACCOUNT = "lamas"  # Firecrawl account name in ACI
+
+
+def _delta_text(content) -> str:
+    """Text of a streamed delta; magistral may send a list of chunks, where thinking chunks are skipped."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(getattr(chunk, "text", "") or "" for chunk in content if getattr(chunk, "type", "text") == "text")
+    return ""
+
+
+def _usage(usage) -> dict | None:
+    if usage is None:
+        return None
+    return {"prompt_tokens": getattr(usage, "prompt_tokens", None), "completion_tokens": getattr(usage, "completion_tokens", None)}
+
+
+class LiveUpstreams:
+    """The real services. Clients are created on first use and shared afterwards."""
+
+    def __init__(self):
+        self._clients = {}
+
+    def _client(self, name: str, factory):
+        client = self._clients.get(name)
+        if client is None:
+            client = self._clients[name] = factory()
+        return client
+
+    @property
+    def aci(self):
+        from aci import ACI
+
+        return self._client("aci", lambda: ACI(api_key=os.getenv("ACI_API_KEY")))
+
+    @property
+    def mistral(self):
+        import httpx
+        from mistralai import Mistral
+
+        return self._client("mistral", lambda: Mistral(
+            api_key=os.getenv("MISTRAL_API_KEY"),
+            async_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+                timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=10.0),
+            ),
+        ))
+
+    @property
+    def session(self):
+        import requests
+
+        return self._client("session", requests.Session)
+
+    @property
+    def elevenlabs_async(self):
+        import httpx
+
+        return self._client("elevenlabs_async", lambda: httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+            timeout=httpx.Timeout(300.0, connect=10.0),
+        ))
+
+    def warm_up(self):
+        """Build every client now instead of on the first request."""
+        for name in ("aci", "mistral", "session", "elevenlabs_async"):
+            getattr(self, name)
+
+    def firecrawl_scrape(self, body: dict) -> dict:
+        result = self.aci.functions.execute("FIRECRAWL__SCRAPE", body, FIRECRAWL_ACCOUNT)
+        return result.model_dump(exclude_none=True)
+
+    async def afirecrawl_scrape(self, body: dict) -> dict:
+        # The ACI SDK only ships a sync client; run it in a thread to keep its retries and error handling.
+        return await asyncio.to_thread(self.firecrawl_scrape, body)
+
+    def mistral_complete(self, **request) -> dict:
+        resp = self.mistral.chat.complete(**request)
+        return {"content": resp.choices[0].message.content, "usage": _usage(resp.usage)}
+
+    async def amistral_complete(self, **request) -> dict:
+        resp = await self.mistral.chat.complete_async(**request)
+        return {"content": resp.choices[0].message.content, "usage": _usage(resp.usage)}
+
+    async def amistral_stream(self, **request):
+        # Opening the stream raises on 429, so callers can retry this call under their limiter.
+        stream = await self.mistral.chat.stream_async(**request)
+
+        async def chunks():
+            async with stream as events:
+                async for event in events:
+                    usage = _usage(getattr(event.data, "usage", None))  # sent with the last chunk
+                    text = _delta_text(event.data.choices[0].delta.content) if event.data.choices else ""
+                    yield {"text": text, "usage": usage}
+
+        return chunks()
+
+    def yahoo_quote(self, symbols: str) -> dict:
+        from yfinance.data import YfData
+
+        return YfData().get_raw_json(
+            "https://query1.finance.yahoo.com/v7/finance/quote",
+            params={"symbols": symbols, "formatted": "false"},
+        )
+
+    def yf_download(self, tickers: list[str], start: str):
+        import yfinance as yf
+
+        return yf.download(tickers, start=start, interval="1d", auto_adjust=False, progress=False, group_by="column")
+
+    def elevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        return self.session.post(url, json=payload, headers=headers)
+
+    async def aelevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        return await self.elevenlabs_async.post(url, json=payload, headers=headers)
+
+    async def aelevenlabs_stream(self, url: str, headers: dict, payload: dict):
+        client = self.elevenlabs_async
+        request = client.build_request("POST", url, json=payload, headers=headers)
+        return await client.send(request, stream=True)
+
+    async def aclose(self):
+        client = self._clients.pop("elevenlabs_async", None)
+        if client is not None:
+            await client.aclose()
+        mistral = self._clients.pop("mistral", None)
+        if mistral is not None:
+            await mistral.sdk_configuration.async_client.aclose()
+
+
+class RecordedResponse:
+    """An HTTP response read back from a fixture; quacks like the requests/httpx responses tts.py uses."""
+
+    def __init__(self, status_code: int, headers: dict, content: bytes, delay: float = 0.0):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.delay = delay
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    async def aiter_bytes(self, chunk_size: int = 16 * 1024):
+        chunks = max(1, math.ceil(len(self.content) / chunk_size))
+        for i in range(0, len(self.content), chunk_size):
+            await asyncio.sleep(self.delay / chunks)
+            yield self.content[i:i + chunk_size]
+
+    async def aread(self) -> bytes:
+        return self.content
+
+    async def aclose(self):
+        pass
+
+
+def _frame_to_json(frame) -> dict:
+    import pandas as pd
+
+    columns = [list(c) if isinstance(c, tuple) else c for c in frame.columns]
+    index = [pd.Timestamp(ts).strftime("%Y-%m-%d") for ts in frame.index]
+    data = [[None if pd.isna(value) else float(value) for value in row] for row in frame.to_numpy()]
+    return {"columns": columns, "index": index, "data": data}
+
+
+def _frame_from_json(data: dict):
+    import pandas as pd
+
+    columns = data["columns"]
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples([tuple(c) for c in columns])
+    return pd.DataFrame(data["data"], index=pd.to_datetime(data["index"]), columns=columns, dtype=float)
+
+
+def _response_to_json(response) -> dict:
+    retry_after = response.headers.get("retry-after")
+    return {
+        "status_code": response.status_code,
+        "headers": {"retry-after": retry_after} if retry_after else {},
+        "content": base64.b64encode(response.content).decode("ascii"),
+    }
+
+
+def _response_from_json(data: dict, delay: float = 0.0) -> RecordedResponse:
+    return RecordedResponse(data["status_code"], data["headers"], base64.b64decode(data["content"]), delay)
+
+
+class FixtureMissing(KeyError):
+    """Replay found no recording for a request."""
+
+
+class FixtureStore:
+    """One JSON file per recorded call, at <root>/<kind>/<sha256 of the request>.json."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, kind: str, request) -> str:
+        key = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, kind, f"{key}.json")
+
+    def save(self, kind: str, request, response, seconds: float):
+        path = self.path(kind, request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"request": request, "response": response, "seconds": seconds}, f, default=str)
+        os.replace(tmp, path)
+
+    def load(self, kind: str, request) -> dict:
+        try:
+            with open(self.path(kind, request)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise FixtureMissing(f"No {kind} fixture for {json.dumps(request, default=str)[:200]}") from None
+
+
+def _speech_key(url: str, payload: dict):
+    # Headers carry the API key and are left out of fixtures.
+    return {"url": url, "payload": payload}
+
+
+class RecordingUpstreams:
+    """Passes calls through to `inner` and saves each successful response as a fixture."""
+
+    def __init__(self, inner, store: FixtureStore):
+        self.inner = inner
+        self.store = store
+
+    def _timed(self, fn, *args, **kwargs):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, time.perf_counter() - started
+
+    async def _atimed(self, afn, *args, **kwargs):
+        started = time.perf_counter()
+        result = await afn(*args, **kwargs)
+        return result, time.perf_counter() - started
+
+    def firecrawl_scrape(self, body: dict) -> dict:
+        result, seconds = self._timed(self.inner.firecrawl_scrape, body)
+        self.store.save("firecrawl", body, result, seconds)
+        return result
+
+    async def afirecrawl_scrape(self, body: dict) -> dict:
+        result, seconds = await self._atimed(self.inner.afirecrawl_scrape, body)
+        self.store.save("firecrawl", body, result, seconds)
+        return result
+
+    def mistral_complete(self, **request) -> dict:
+        result, seconds = self._timed(self.inner.mistral_complete, **request)
+        self.store.save("mistral", request, result, seconds)
+        return result
+
+    async def amistral_complete(self, **request) -> dict:
+        result, seconds = await self._atimed(self.inner.amistral_complete, **request)
+        self.store.save("mistral", request, result, seconds)
+        return result
+
+    async def amistral_stream(self, **request):
+        started = time.perf_counter()
+        chunks = await self.inner.amistral_stream(**request)
+
+        async def recording():
+            recorded = []
+            async for chunk in chunks:
+                recorded.append(chunk)
+                yield chunk
+            self.store.save("mistral_stream", request, recorded, time.perf_counter() - started)
+
+        return recording()
+
+    def yahoo_quote(self, symbols: str) -> dict:
+        result, seconds = self._timed(self.inner.yahoo_quote, symbols)
+        self.store.save("yahoo", symbols, result, seconds)
+        return result
+
+    def yf_download(self, tickers: list[str], start: str):
+        frame, seconds = self._timed(self.inner.yf_download, tickers, start)
+        self.store.save("yfinance", {"tickers": tickers, "start": start}, _frame_to_json(frame), seconds)
+        return frame
+
+    def elevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        response, seconds = self._timed(self.inner.elevenlabs_speech, url, headers, payload)
+        if response.status_code == 200:
+            self.store.save("elevenlabs", _speech_key(url, payload), _response_to_json(response), seconds)
+        return response
+
+    async def aelevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        response, seconds = await self._atimed(self.inner.aelevenlabs_speech, url, headers, payload)
+        if response.status_code == 200:
+            self.store.save("elevenlabs", _speech_key(url, payload), _response_to_json(response), seconds)
+        return response
+
+    async def aelevenlabs_stream(self, url: str, headers: dict, payload: dict):
+        started = time.perf_counter()
+        response = await self.inner.aelevenlabs_stream(url, headers, payload)
+        if response.status_code != 200:
+            return response
+        store = self.store
+        inner_iter = response.aiter_bytes
+
+        async def aiter_bytes(chunk_size: int = 16 * 1024):
+            body = bytearray()
+            async for chunk in inner_iter(chunk_size):
+                body += chunk
+                yield chunk
+            recorded = RecordedResponse(response.status_code, dict(response.headers), bytes(body))
+            store.save("elevenlabs", _speech_key(url, payload), _response_to_json(recorded), time.perf_counter() - started)
+
+        response.aiter_bytes = aiter_bytes
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class ReplayUpstreams:
+    """
+    Serves recorded fixtures. Each reply waits `latency` seconds, or the
+    recorded duration times `latency_scale` when `latency` is None. Requests
+    with no fixture go to `fallback` if given, otherwise raise FixtureMissing.
+    """
+
+    def __init__(self, store: FixtureStore, latency: float | None = None, latency_scale: float = 1.0, fallback=None):
+        self.store = store
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+
+    def _delay(self, fixture: dict) -> float:
+        return self.latency if self.latency is not None else fixture["seconds"] * self.latency_scale
+
+    def _load(self, kind: str, request):
+        try:
+            return self.store.load(kind, request)
+        except FixtureMissing:
+            if self.fallback is None:
+                raise
+            return None
+
+    def _replay(self, kind: str, request, method: str, *args, **kwargs):
+        fixture = self._load(kind, request)
+        if fixture is None:
+            return getattr(self.fallback, method)(*args, **kwargs)
+        time.sleep(self._delay(fixture))
+        return fixture["response"]
+
+    async def _areplay(self, kind: str, request, method: str, *args, **kwargs):
+        fixture = self._load(kind, request)
+        if fixture is None:
+            return await getattr(self.fallback, method)(*args, **kwargs)
+        await asyncio.sleep(self._delay(fixture))
+        return fixture["response"]
+
+    def firecrawl_scrape(self, body: dict) -> dict:
+        return self._replay("firecrawl", body, "firecrawl_scrape", body)
+
+    async def afirecrawl_scrape(self, body: dict) -> dict:
+        return await self._areplay("firecrawl", body, "afirecrawl_scrape", body)
+
+    def mistral_complete(self, **request) -> dict:
+        return self._replay("mistral", request, "mistral_complete", **request)
+
+    async def amistral_complete(self, **request) -> dict:
+        return await self._areplay("mistral", request, "amistral_complete", **request)
+
+    async def amistral_stream(self, **request):
+        fixture = self._load("mistral_stream", request)
+        if fixture is None:
+            return await self.fallback.amistral_stream(**request)
+        delay = self._delay(fixture) / max(1, len(fixture["response"]))
+
+        async def chunks():
+            for chunk in fixture["response"]:
+                await asyncio.sleep(delay)
+                yield chunk
+
+        return chunks()
+
+    def yahoo_quote(self, symbols: str) -> dict:
+        return self._replay("yahoo", symbols, "yahoo_quote", symbols)
+
+    def yf_download(self, tickers: list[str], start: str):
+        fixture = self._load("yfinance", {"tickers": tickers, "start": start})
+        if fixture is None:
+            return self.fallback.yf_download(tickers, start)
+        time.sleep(self._delay(fixture))
+        return _frame_from_json(fixture["response"])
+
+    def elevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        fixture = self._load("elevenlabs", _speech_key(url, payload))
+        if fixture is None:
+            return self.fallback.elevenlabs_speech(url, headers, payload)
+        time.sleep(self._delay(fixture))
+        return _response_from_json(fixture["response"])
+
+    async def aelevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        fixture = self._load("elevenlabs", _speech_key(url, payload))
+        if fixture is None:
+            return await self.fallback.aelevenlabs_speech(url, headers, payload)
+        await asyncio.sleep(self._delay(fixture))
+        return _response_from_json(fixture["response"])
+
+    async def aelevenlabs_stream(self, url: str, headers: dict, payload: dict):
+        fixture = self._load("elevenlabs", _speech_key(url, payload))
+        if fixture is None:
+            return await self.fallback.aelevenlabs_stream(url, headers, payload)
+        # Headers arrive after a tenth of the recorded time; the body is spread over the rest.
+        delay = self._delay(fixture)
+        await asyncio.sleep(delay / 10)
+        return _response_from_json(fixture["response"], delay * 9 / 10)
+
+    async def aclose(self):
+        if self.fallback is not None:
+            await self.fallback.aclose()
+
+
+# Typical live latencies, in seconds, used by SyntheticUpstreams.
+SYNTHETIC_LATENCY = {"firecrawl": 1.5, "mistral": 2.0, "yahoo": 0.3, "yfinance": 0.8, "elevenlabs": 3.0}
+
+
+class SyntheticUpstreams:
+    """
+    Deterministic made-up responses with realistic shapes and latencies, so the
+    whole pipeline runs with no network and no fixtures, e.g. for benchmarks.
+    """
+
+    # One silent MPEG-1 Layer III frame (128 kbit/s, 44.1 kHz, ~26 ms).
+    MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes(413)
+
+    def __init__(self, latency: dict | None = None, latency_scale: float = 1.0):
+        self.latency = dict(SYNTHETIC_LATENCY if latency is None else latency)
+        self.latency_scale = latency_scale
+
+    def _delay(self, upstream: str) -> float:
+        return self.latency.get(upstream, 0.0) * self.latency_scale
+
+    @staticmethod
+    def _rng(*parts) -> random.Random:
+        return random.Random(hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).digest())
+
+    def _page(self, body: dict) -> dict:
+        url = body["body"]["url"]
+        rng = self._rng("page", url)
+        lines = [f"# {url.rstrip('/').rsplit('/', 1)[-1]}"]
+        for i in range(40):
+            lines.append(f"- [Headline {i}: shares move {rng.uniform(-3, 3):.2f}% on earnings](/news/story-{i}-{rng.randrange(10**6)}.html)")
+        return {"success": True, "data": {"data": {"markdown": "\n".join(lines)}}}
+
+    def _completion(self, request: dict) -> dict:
+        system = request["messages"][0]["content"]
+        user = request["messages"][-1]["content"]
+        rng = self._rng("chat", request["model"], system, user)
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            if "article_urls" in system:
+                content = json.dumps({"article_urls": [f"https://finance.yahoo.com/news/story-{i}.html" for i in range(10)]})
+            else:
+                content = json.dumps({"tickers": ["AAPL", "MSFT"], "sectors": ["technology"], "markets": ["crypto"]})
+        else:
+            content = " ".join(f"Sentence {i} of a synthetic summary, moving {rng.uniform(-3, 3):.2f}%." for i in range(12))
+        prompt_tokens = (len(system) + len(user)) // 4
+        return {"content": content, "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4}}
+
+    def _quote(self, symbols: str) -> dict:
+        results = []
+        for symbol in symbols.split(","):
+            rng = self._rng("quote", symbol)
+            price = rng.uniform(50, 900)
+            results.append({
+                "symbol": symbol, "longName": f"{symbol} Inc.", "currency": "USD",
+                "regularMarketPrice": price, "regularMarketChangePercent": rng.uniform(-3, 3),
+                "regularMarketPreviousClose": price * rng.uniform(0.97, 1.03),
+                "bid": price * 0.999, "ask": price * 1.001,
+            })
+        return {"quoteResponse": {"result": results}}
+
+    def _frame(self, tickers: list[str], start: str):
+        import numpy as np
+        import pandas as pd
+
+        index = pd.bdate_range(start, pd.Timestamp.now().normalize())
+        columns, data = [], []
+        for ticker in tickers:
+            rng = np.random.default_rng(int.from_bytes(hashlib.sha256(ticker.encode()).digest()[:4], "little"))
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(index))))
+            for field, values in (("Open", close * 0.998), ("High", close * 1.01), ("Low", close * 0.99),
+                                  ("Close", close), ("Adj Close", close), ("Volume", rng.integers(1e6, 5e7, len(index)))):
+                columns.append((field, ticker))
+                data.append(values)
+        return pd.DataFrame(np.column_stack(data) if data else None, index=index,
+                            columns=pd.MultiIndex.from_tuples(columns) if columns else None)
+
+    def _speech(self, payload: dict) -> RecordedResponse:
+        # Roughly 15 characters of speech per second, 38 frames per second.
+        frames = max(1, len(payload["text"]) * 38 // 15)
+        return RecordedResponse(200, {}, self.MP3_FRAME * frames)
+
+    def firecrawl_scrape(self, body: dict) -> dict:
+        time.sleep(self._delay("firecrawl"))
+        return self._page(body)
+
+    async def afirecrawl_scrape(self, body: dict) -> dict:
+        await asyncio.sleep(self._delay("firecrawl"))
+        return self._page(body)
+
+    def mistral_complete(self, **request) -> dict:
+        time.sleep(self._delay("mistral"))
+        return self._completion(request)
+
+    async def amistral_complete(self, **request) -> dict:
+        await asyncio.sleep(self._delay("mistral"))
+        return self._completion(request)
+
+    async def amistral_stream(self, **request):
+        await asyncio.sleep(self._delay("mistral") / 4)
+        words = ["[Final Podcast Script]\n"] + self._completion(request)["content"].split(" ") + ["\n[End of Podcast Script]"]
+        delay = self._delay("mistral") / len(words)
+
+        async def chunks():
+            for word in words:
+                await asyncio.sleep(delay)
+                yield {"text": word + " ", "usage": None}
+
+        return chunks()
+
+    def yahoo_quote(self, symbols: str) -> dict:
+        time.sleep(self._delay("yahoo"))
+        return self._quote(symbols)
+
+    def yf_download(self, tickers: list[str], start: str):
+        time.sleep(self._delay("yfinance"))
+        return self._frame(tickers, start)
+
+    def elevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        time.sleep(self._delay("elevenlabs"))
+        return self._speech(payload)
+
+    async def aelevenlabs_speech(self, url: str, headers: dict, payload: dict):
+        await asyncio.sleep(self._delay("elevenlabs"))
+        return self._speech(payload)
+
+    async def aelevenlabs_stream(self, url: str, headers: dict, payload: dict):
+        await asyncio.sleep(self._delay("elevenlabs") / 10)
+        response = self._speech(payload)
+        response.delay = self._delay("elevenlabs") * 9 / 10
+        return response
+
+    async def aclose(self):
+        pass
+
+
+def _from_env():
+    mode = os.getenv("UPSTREAM_MODE", "live")
+    store = FixtureStore(os.getenv("UPSTREAM_FIXTURES", os.path.join("fixtures", "upstream")))
+    latency = os.getenv("UPSTREAM_REPLAY_LATENCY", "recorded")
+    if mode == "record":
+        return RecordingUpstreams(LiveUpstreams(), store)
+    if mode == "replay":
+        return ReplayUpstreams(store, latency=None if latency == "recorded" else float(latency))
+    if mode == "synthetic":
+        return SyntheticUpstreams(latency_scale=float(os.getenv("UPSTREAM_SYNTHETIC_LATENCY_SCALE", "1")))
+    return LiveUpstreams()
+
+
+upstreams = None
+
+
+def get_upstreams():
+    global upstreams
+    if upstreams is None:
+        upstreams = _from_env()
+    return upstreams
+
+
+def set_upstreams(adapter):
+    """Swap the adapter every upstream call goes through, e.g. a ReplayUpstreams in benchmarks."""
+    global upstreams
+    upstreams = adapter
@@ -0,0 +1,128 @@
+# Keeps the caches warm for the tickers, sectors and markets most requests ask about.
+# Runs inside the API process when CACHE_WARMER=1, or standalone: `python warmer.py [--once]`.
+# Either way it fills the on-disk caches (pages, completions, prices) that every API worker reads.
+# With several API workers, only the first to start runs it.
+import argparse
+import asyncio
+import os
+import time
+
+import pipeline
+from cache import scrape_cache
+from shared import FileLock
+from scrape import (SECTORS, MARKETS, get_technical_summaries, aget_news, aget_sector_news,
+                    aget_market_news)
+
+# Same names the frontend's ticker bar shows.
+TOP_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
+
+
+def _env_list(name: str, default: list[str]) -> list[str]:
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+WARM_TICKERS = _env_list("WARM_TICKERS", TOP_TICKERS)
+WARM_SECTORS = _env_list("WARM_SECTORS", SECTORS)
+WARM_MARKETS = _env_list("WARM_MARKETS", MARKETS)
+WARM_INTERVAL_SECONDS = float(os.getenv("WARM_INTERVAL_SECONDS", "300"))
+# While live requests are running the warmer waits, but never longer than this per item.
+WARM_MAX_YIELD_SECONDS = float(os.getenv("WARM_MAX_YIELD_SECONDS", "30"))
+WARM_LOCK_PATH = os.getenv("WARM_LOCK_PATH", os.path.join(".cache", "warmer.lock"))
+
+
+class CacheWarmer:
+    """
+    Refreshes technicals, news, sector and market summaries for a hot set
+    on an interval. Key facts are left out: quotes are not cached, so
+    fetching them ahead of time would not speed up a live request. Items run
+    one at a time and each waits for live pipelines to finish first, so
+    warming only uses capacity left over by live traffic.
+    """
+
+    def __init__(self, tickers=None, sectors=None, markets=None,
+                 interval: float = WARM_INTERVAL_SECONDS, max_yield: float = WARM_MAX_YIELD_SECONDS):
+        self.tickers = WARM_TICKERS if tickers is None else tickers
+        self.sectors = WARM_SECTORS if sectors is None else sectors
+        self.markets = WARM_MARKETS if markets is None else markets
+        self.interval = interval
+        self.max_yield = max_yield
+        self._task = None
+        self._running = FileLock(WARM_LOCK_PATH)
+        self.counters = {"passes": 0, "items": 0, "errors": 0, "yielded_seconds": 0.0, "last_pass_seconds": None}
+
+    def items(self):
+        if self.tickers:
+            yield "technicals", get_technical_summaries, self.tickers
+        for ticker in self.tickers:
+            yield f"news:{ticker}", aget_news, ticker
+        for sector in self.sectors:
+            yield f"sector:{sector}", aget_sector_news, sector
+        for market in self.markets:
+            yield f"market:{market}", aget_market_news, market
+
+    async def _yield_to_live_traffic(self):
+        started = time.monotonic()
+        while pipeline.live_requests.active() and time.monotonic() - started < self.max_yield:
+            await asyncio.sleep(0.5)
+        self.counters["yielded_seconds"] += time.monotonic() - started
+
+    async def warm_once(self):
+        started = time.monotonic()
+        for label, fn, *args in self.items():
+            await self._yield_to_live_traffic()
+            try:
+                # Fetch new pages even while cached ones are fresh, so the summaries
+                # built from them are what the next live request will look up.
+                with scrape_cache.refreshing():
+                    if asyncio.iscoroutinefunction(fn):
+                        await fn(*args)
+                    else:
+                        await asyncio.to_thread(fn, *args)
+                self.counters["items"] += 1
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"Cache warmer: {label} failed: {e}")
+        self.counters["passes"] += 1
+        self.counters["last_pass_seconds"] = time.monotonic() - started
+
+    async def run_forever(self):
+        while True:
+            started = time.monotonic()
+            await self.warm_once()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> bool:
+        """Start warming in the background unless another process on the host already is."""
+        if self._task is None:
+            if not self._running.acquire(blocking=False):
+                return False
+            self._task = asyncio.create_task(self.run_forever())
+        return True
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._running.release()
+
+    def stats(self) -> dict:
+        return {**self.counters, "running": self._task is not None, "interval": self.interval}
+
+
+warmer = CacheWarmer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the Stockast caches for popular tickers, sectors and markets.")
+    parser.add_argument("--once", action="store_true", help="run one pass and exit")
+    args = parser.parse_args()
+    # Standalone runs share the machine with the API; let the scheduler favour it.
+    os.nice(10)
+    asyncio.run(warmer.warm_once() if args.once else warmer.run_forever())